@@ -11,4 +11,99 @@ ADMIN_NAME = os.getenv("ADMIN_NAME")
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
 
-STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
\ No newline at end of file
+STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
+
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "1024"))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))
+
+# how often each worker checks the products version marker and applies other workers'
+# product changes to its autocomplete and in-memory search indexes
+SUGGEST_REFRESH_INTERVAL = float(os.getenv("SUGGEST_REFRESH_INTERVAL", "5"))
+SEARCH_REFRESH_INTERVAL = float(os.getenv("SEARCH_REFRESH_INTERVAL", "5"))
+
+# "memory" (pure-Python inverted index) or "postgres"; defaults to the database dialect
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND")
+
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("MAX_IMAGE_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# room for multipart framing and the other form fields around the image in an upload request
+IMAGE_UPLOAD_FORM_OVERHEAD = int(os.getenv("IMAGE_UPLOAD_FORM_OVERHEAD", str(64 * 1024)))
+
+IMAGE_DERIVATIVE_WIDTHS = [int(w) for w in os.getenv("IMAGE_DERIVATIVE_WIDTHS", "320,640,1024").split(",")]
+IMAGE_DERIVATIVE_FORMATS = os.getenv("IMAGE_DERIVATIVE_FORMATS", "webp,avif").split(",")
+IMAGE_DERIVATIVE_WORKERS = int(os.getenv("IMAGE_DERIVATIVE_WORKERS", "2"))
+
+STATIC_CACHE_MAX_BYTES = int(os.getenv("STATIC_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+STATIC_CACHE_MAX_FILE_BYTES = int(os.getenv("STATIC_CACHE_MAX_FILE_BYTES", str(64 * 1024)))
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "2000"))
+
+# "database" (default), "memory" (in-process key-value stand-in, single worker only:
+# with WEB_CONCURRENCY > 1 the database store is used instead) or a redis:// url
+CART_STORE = os.getenv("CART_STORE", "database")
+# worker processes the server runs (the variable uvicorn and gunicorn read)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+CART_FLUSH_INTERVAL = float(os.getenv("CART_FLUSH_INTERVAL", "2"))
+CART_FLUSH_BATCH = int(os.getenv("CART_FLUSH_BATCH", "500"))
+CART_TTL = int(os.getenv("CART_TTL", str(24 * 3600)))
+
+# how long a pending order holds its stock, and how often expired holds are released
+RESERVATION_TTL = int(os.getenv("RESERVATION_TTL", str(15 * 60)))
+RESERVATION_SWEEP_INTERVAL = float(os.getenv("RESERVATION_SWEEP_INTERVAL", "30"))
+RESERVATION_SWEEP_BATCH = int(os.getenv("RESERVATION_SWEEP_BATCH", "500"))
+
+# counters for products flagged Inventory.sharded: a redis:// url, shared by every worker.
+# "memory" (the default) can't be shared, so sharding stays off and flagged products sell from their rows
+STOCK_COUNTER_STORE = os.getenv("STOCK_COUNTER_STORE", "memory")
+STOCK_SHARDS = int(os.getenv("STOCK_SHARDS", "8"))
+STOCK_RECONCILE_INTERVAL = float(os.getenv("STOCK_RECONCILE_INTERVAL", "5"))
+
+# async checkout (POST /orders?mode=async): "memory" (in-process queue) or "database" (orders table, SKIP LOCKED)
+ORDER_QUEUE = os.getenv("ORDER_QUEUE", "memory")
+ORDER_WORKERS = int(os.getenv("ORDER_WORKERS", "4"))
+ORDER_QUEUE_POLL_INTERVAL = float(os.getenv("ORDER_QUEUE_POLL_INTERVAL", "1"))
+# how often each worker looks for processed async orders to push to its /orders/ws sockets
+ORDER_PUSH_INTERVAL = float(os.getenv("ORDER_PUSH_INTERVAL", "0.5"))
+
+# Idempotency-Key replay window, how long a duplicate waits for the in-flight request, sweep cadence
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "10"))
+# an in_progress claim older than this is from a crashed request and can be taken over
+IDEMPOTENCY_LOCK_TIMEOUT = float(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "60"))
+IDEMPOTENCY_SWEEP_INTERVAL = float(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL", "300"))
+IDEMPOTENCY_SWEEP_BATCH = int(os.getenv("IDEMPOTENCY_SWEEP_BATCH", "5000"))
+
+INVENTORY_BULK_CHUNK = int(os.getenv("INVENTORY_BULK_CHUNK", "1000"))
+
+# low-stock alerts: default threshold (Inventory.low_stock_threshold overrides it per product),
+# minimum seconds between alerts for one product, and how often pending alerts go out
+LOW_STOCK_THRESHOLD = int(os.getenv("LOW_STOCK_THRESHOLD", "10"))
+STOCK_ALERT_INTERVAL = float(os.getenv("STOCK_ALERT_INTERVAL", "60"))
+STOCK_ALERT_FLUSH_INTERVAL = float(os.getenv("STOCK_ALERT_FLUSH_INTERVAL", "2"))
+
+# payment provider: "stripe" (HTTP API, needs STRIPE_SECRET_KEY or startup fails) or
+# "fake" (in-process, for offline and load testing; only when set explicitly)
+PAYMENT_PROVIDER = os.getenv("PAYMENT_PROVIDER", "stripe")
+PAYMENT_API_BASE = os.getenv("PAYMENT_API_BASE", "https://api.stripe.com")
+PAYMENT_POOL_SIZE = int(os.getenv("PAYMENT_POOL_SIZE", "20"))
+# whole-call deadline (all attempts included), retries on timeouts / 429 / 5xx, base backoff
+PAYMENT_TIMEOUT = float(os.getenv("PAYMENT_TIMEOUT", "5"))
+PAYMENT_RETRIES = int(os.getenv("PAYMENT_RETRIES", "2"))
+PAYMENT_BACKOFF = float(os.getenv("PAYMENT_BACKOFF", "0.2"))
+# consecutive failures that open the circuit, and seconds before a trial call is let through
+PAYMENT_BREAKER_THRESHOLD = int(os.getenv("PAYMENT_BREAKER_THRESHOLD", "5"))
+PAYMENT_BREAKER_RESET = float(os.getenv("PAYMENT_BREAKER_RESET", "30"))
+# fake provider behaviour
+PAYMENT_FAKE_LATENCY = float(os.getenv("PAYMENT_FAKE_LATENCY", "0"))
+PAYMENT_FAKE_FAILURE_RATE = float(os.getenv("PAYMENT_FAKE_FAILURE_RATE", "0"))
+
+# payment webhooks: signing secret, accepted clock skew, inbox write batch, apply cadence and batch
+PAYMENT_WEBHOOK_SECRET = os.getenv("PAYMENT_WEBHOOK_SECRET")
+WEBHOOK_TOLERANCE = int(os.getenv("WEBHOOK_TOLERANCE", "300"))
+WEBHOOK_INBOX_BATCH = int(os.getenv("WEBHOOK_INBOX_BATCH", "500"))
+WEBHOOK_APPLY_INTERVAL = float(os.getenv("WEBHOOK_APPLY_INTERVAL", "1"))
+WEBHOOK_APPLY_BATCH = int(os.getenv("WEBHOOK_APPLY_BATCH", "500"))
+# an event whose intent has no Payment row yet (its commit may still be in flight) is
+# retried this long after receipt, then marked "unmatched" and reported to admins
+WEBHOOK_UNMATCHED_MAX_AGE = float(os.getenv("WEBHOOK_UNMATCHED_MAX_AGE", "3600"))
@@ -27,8 +27,11 @@ def create_token(data: dict):
 # it used to get the current user from the token
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(http_bearer), db: Session = Depends(get_db)):
+    return user_from_token(credentials.credentials)
+
+
+def user_from_token(token: str) -> dict:
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         
         id = payload.get("id")
@@ -0,0 +1,58 @@
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+
+from app.src.db.database import Base
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade_schema(engine: Engine) -> list[str]:
+    """
+    Brings a database created by an older version up to the models, after
+    create_all has created any missing tables. create_all never alters a table that
+    already exists, so this adds the columns and indexes those tables are missing:
+
+        ALTER TABLE products ADD COLUMN thumbnail_path VARCHAR
+        CREATE INDEX ix_orders_created_at_id ON orders (created_at, id)
+
+    Only additive changes are made. A new NOT NULL column needs a server_default
+    so existing rows get a value. Returns the statements that were run.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    applied = []
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(
+                        f"Cannot add NOT NULL column {table.name}.{column.name} without a server_default"
+                    )
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                statement = f"ALTER TABLE {table.name} ADD COLUMN {ddl}"
+                conn.execute(text(statement))
+                applied.append(statement)
+
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in indexes:
+                    continue
+                # dialect-specific indexes (e.g. the Postgres GIN search index)
+                if index._ddl_if is not None and index._ddl_if.dialect not in (None, engine.dialect.name):
+                    continue
+                index.create(bind=conn)
+                applied.append(f"CREATE INDEX {index.name}")
+
+    for statement in applied:
+        logger.info("Schema upgrade: %s", statement)
+    return applied
@@ -4,4 +4,8 @@ from app.src.models.inventory import Inventory
 from app.src.models.user import User
 from app.src.models.orders import Order, OrderItem
 from app.src.models.cart import Cart
-from app.src.models.payments import Payment
\ No newline at end of file
+from app.src.models.payments import Payment
+from app.src.models.versions import TableVersion
+from app.src.models.reservations import StockReservation
+from app.src.models.idempotency import IdempotencyKey
+from app.src.models.webhooks import WebhookEvent
\ No newline at end of file
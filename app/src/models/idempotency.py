@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, UniqueConstraint
+from datetime import datetime
+from app.src.db.database import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_keys'
+
+    # one row per (scope, Idempotency-Key): claimed as "in_progress" before the
+    # handler runs, then holds the response that retries get replayed
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="in_progress")  # in_progress, completed
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    response_headers = Column(Text, nullable=True)
+    # lease of the in_progress claim; past IDEMPOTENCY_LOCK_TIMEOUT another request may take it over
+    locked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
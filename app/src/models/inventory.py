@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, ForeignKey, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, CheckConstraint, UniqueConstraint, Index, false, text
 from app.src.db.database import Base
 
+# low-stock listings with a threshold up to this value are served by the partial index
+LOW_STOCK_INDEX_THRESHOLD = 50
+
 class Inventory(Base):
     __tablename__ = "inventory"
 
@@ -12,7 +15,18 @@ class Inventory(Base):
         unique=True  
     )
     stock_quantity = Column(Integer, nullable=False)
+    # flash-sale products: checkout decrements sharded counters and
+    # stock_quantity is folded back from them by the reconciler
+    sharded = Column(Boolean, nullable=False, default=False, server_default=false())
+    # admins are alerted when stock falls to this level; NULL means LOW_STOCK_THRESHOLD
+    low_stock_threshold = Column(Integer, nullable=True)
 
     __table_args__ = (
         CheckConstraint("stock_quantity >= 0", name="stock_quantity_non_negative"),
+        # admin low-stock view: only the (few) nearly sold-out rows, in keyset order
+        Index(
+            "ix_inventory_low_stock", "product_id", "stock_quantity",
+            postgresql_where=text(f"stock_quantity <= {LOW_STOCK_INDEX_THRESHOLD}"),
+            sqlite_where=text(f"stock_quantity <= {LOW_STOCK_INDEX_THRESHOLD}")
+        ),
     )
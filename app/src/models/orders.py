@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.src.db.database import Base
@@ -9,21 +9,44 @@ class Order(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('usertable.id'), nullable=False)
     total_price = Column(Float, nullable=False)
-    status = Column(String, default="pending")  
+    status = Column(String, default="pending")  # queued, pending, paid, failed, canceled, expired
+    failure_reason = Column(String, nullable=True)
+    # set when an async order leaves the queue; each process polls it to push the outcome
+    processed_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     user = relationship("User", backref="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     payment = relationship("Payment", back_populates="order", uselist=False)
 
+    __table_args__ = (
+        # per-user version marker (count + max(updated_at)) for conditional GET /orders
+        Index("ix_orders_user_id_updated_at", "user_id", "updated_at"),
+        # keyset pagination of a user's order history, newest first
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        # admin order search: every filter combination leads with its most selective
+        # equality (user, then status) and walks (created_at, id) for the date range and keyset
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_total_price", "total_price"),
+        # recently processed async orders, for the status push
+        Index("ix_orders_processed_at", "processed_at"),
+        # the async checkout queue: only queued rows are indexed
+        Index(
+            "ix_orders_queued", "id",
+            postgresql_where=text("status = 'queued'"), sqlite_where=text("status = 'queued'")
+        ),
+    )
+
 
 
 class OrderItem(Base):
     __tablename__ = 'order_items'
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
@@ -11,6 +11,8 @@ class Payment(Base):
     amount = Column(Float, nullable=False)
     currency = Column(String, default='usd')
     status = Column(String, default='pending') # pending, succeeded, failed, canceled
+    # the provider's PaymentIntent id, to match its webhooks back to this row
+    provider_intent_id = Column(String, unique=True, index=True, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     order = relationship('Order', back_populates='payment')
\ No newline at end of file
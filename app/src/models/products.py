@@ -1,7 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Index, JSON, text
 from sqlalchemy.orm import relationship
 from app.src.db.database import Base
 
+
+# Expression behind the Postgres full-text GIN index. Search queries must use this exact
+# expression for the planner to pick the index.
+PRODUCT_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
 class Product(Base):
     __tablename__ = 'products'
     id = Column(Integer, primary_key=True, index=True)
@@ -9,10 +18,29 @@ class Product(Base):
     description = Column(Text, nullable=True)
     price = Column(Float, nullable=False)
     image_path = Column(String, nullable=False)
+    # filled in by the background derivative pipeline once variants exist on disk
+    thumbnail_path = Column(String, nullable=True)
+    image_variants = Column(JSON, nullable=True)
     
     category_id = Column(Integer, ForeignKey('categories.id'), nullable=False)
+    # set on every write, ORM or Core; in-memory indexes sync the rows changed since their last pass
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
     category_rel = relationship("Category", back_populates="products")
 
-    
-    
-    
\ No newline at end of file
+    # Composite indexes backing the keyset-paginated listing (GET /products):
+    # each one matches a (filter, sort key, id) combination so a page is an index range scan.
+    __table_args__ = (
+        # duplicate-name checks in add_product and the bulk import
+        Index("ix_products_name", "name"),
+        Index("ix_products_category_id_id", "category_id", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_category_id_price_id", "category_id", "price", "id"),
+        # reference counting of content-addressed image files
+        Index("ix_products_image_path", "image_path"),
+        Index("ix_products_updated_at", "updated_at"),
+        Index(
+            "ix_products_search_vector",
+            text(f"({PRODUCT_SEARCH_VECTOR_SQL})"),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from datetime import datetime
+from app.src.db.database import Base
+
+class StockReservation(Base):
+    __tablename__ = 'stock_reservations'
+
+    # stock taken out of inventory for a pending order; handed back if the
+    # order is canceled or still unpaid at expires_at
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey('orders.id', ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey('products.id', ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # the expiry sweep scans by deadline
+        Index("ix_stock_reservations_expires_at", "expires_at"),
+    )
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.src.db.database import Base
+
+class TableVersion(Base):
+    __tablename__ = 'table_versions'
+
+    # one row per versioned table ("products", "categories"); bumped in the same
+    # transaction as every write so readers can build ETags without touching the table
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, UniqueConstraint, text
+from datetime import datetime
+from app.src.db.database import Base
+
+class WebhookEvent(Base):
+    __tablename__ = 'webhook_events'
+
+    # the payment webhook inbox: every verified event is stored once per provider
+    # event id and acknowledged; the applier then works through it in event order
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String, nullable=False)
+    event_id = Column(String, nullable=False)
+    event_type = Column(String, nullable=False)
+    intent_id = Column(String, nullable=True)
+    payload = Column(Text, nullable=False)
+    event_created_at = Column(DateTime, nullable=False)
+    received_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+    result = Column(String, nullable=True)  # applied, ignored, unmatched, needs_refund; NULL while pending
+
+    __table_args__ = (
+        UniqueConstraint("provider", "event_id", name="uq_webhook_events_provider_event_id"),
+        # only unprocessed events, in the order the applier takes them
+        Index(
+            "ix_webhook_events_pending", "event_created_at", "id",
+            postgresql_where=text("processed_at IS NULL"), sqlite_where=text("processed_at IS NULL")
+        ),
+    )
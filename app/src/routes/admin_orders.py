@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.src.core.security import required_role
+from app.src.db.database import get_db
+from app.src.models.orders import Order
+from app.src.schemas.orders import AdminOrderPage
+from app.src.services.order_service import paginate_orders
+from app.src.utils.pagination import estimate_count
+
+router = APIRouter(tags=['Orders'])
+
+
+@router.get('/admin/orders', response_model=AdminOrderPage)
+def search_orders(
+    status: str | None = Query(None),
+    user_id: int | None = Query(None),
+    created_from: datetime | None = Query(None),
+    created_to: datetime | None = Query(None),
+    min_total: float | None = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(required_role('admin'))
+):
+    if created_from and created_to and created_from > created_to:
+        raise HTTPException(status_code=400, detail="created_from must not be after created_to")
+
+    query = db.query(Order)
+    if user_id is not None:
+        query = query.filter(Order.user_id == user_id)
+    if status is not None:
+        query = query.filter(Order.status == status)
+    if created_from is not None:
+        query = query.filter(Order.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(Order.created_at < created_to)
+    if min_total is not None:
+        query = query.filter(Order.total_price >= min_total)
+
+    estimated_total, is_estimate = estimate_count(db, query)
+    orders, next_cursor = paginate_orders(query, limit, cursor)
+    return AdminOrderPage(
+        items=orders,
+        next_cursor=next_cursor,
+        estimated_total=estimated_total,
+        total_is_estimate=is_estimate
+    )
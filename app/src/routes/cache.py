@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+
+from app.src.core.security import required_role
+from app.src.services.catalog_cache import catalog_cache
+
+router = APIRouter(tags=['Cache'])
+
+
+@router.get('/admin/cache/stats')
+def get_cache_stats(current_user: dict = Depends(required_role('admin'))):
+    return catalog_cache.stats()
+
+
+@router.delete('/admin/cache')
+def clear_cache(current_user: dict = Depends(required_role('admin'))):
+    catalog_cache.clear()
+    return {"message": "Catalog cache cleared"}
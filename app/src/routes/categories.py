@@ -1,18 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from typing import List
+import json
 
 from app.src.db.database import get_db
 from app.src.core.security import required_role
 from app.src.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
 from app.src.models.category import Category as CategoryModel
+from app.src.services.catalog_cache import catalog_cache
+from app.src.services.version_service import bump_version, get_version
+from app.src.utils.http_cache import CATALOG_CACHE_CONTROL, make_etag, cache_headers, is_not_modified, not_modified_response
 
 router = APIRouter(tags=['Categories'])
 
+def render_categories(db: Session) -> bytes:
+    categories = db.query(CategoryModel).order_by(CategoryModel.id).all()
+    data = [CategoryResponse.model_validate(category) for category in categories]
+    return json.dumps(jsonable_encoder(data), separators=(",", ":")).encode("utf-8")
+
+
 @router.get('/categories', response_model=List[CategoryResponse])
-def get_categories(db: Session = Depends(get_db)):
-    categories = db.query(CategoryModel).all()
-    return categories
+def get_categories(request: Request, db: Session = Depends(get_db)):
+    version, updated_at = get_version(db, "categories")
+    headers = cache_headers(make_etag("categories", version), updated_at, CATALOG_CACHE_CONTROL)
+    if is_not_modified(request, headers["ETag"], updated_at):
+        return not_modified_response(headers)
+
+    body = catalog_cache.get_or_load(("categories", version), ["categories"], lambda: render_categories(db))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def warm_categories_cache(db: Session):
+    version, _ = get_version(db, "categories")
+    catalog_cache.get_or_load(("categories", version), ["categories"], lambda: render_categories(db))
 
 @router.post('/admin/categories', response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 def create_category(
@@ -29,8 +50,11 @@ def create_category(
         description=category.description
     )
     db.add(new_category)
+    bump_version(db, "categories")
     db.commit()
     db.refresh(new_category)
+
+    catalog_cache.invalidate("categories")
     return new_category
 
 @router.put('/admin/categories/{category_id}', response_model=CategoryResponse)
@@ -53,9 +77,12 @@ def update_category(
         
     if category.description is not None:
         existing_category.description = category.description
-        
+
+    bump_version(db, "categories")
     db.commit()
     db.refresh(existing_category)
+
+    catalog_cache.invalidate("categories")
     return existing_category
 
 @router.delete('/admin/categories/{category_id}', status_code=status.HTTP_204_NO_CONTENT)
@@ -71,5 +98,8 @@ def delete_category(
     # Check if category has products? (Optional but good practice, skipping for now to strict plan)
     
     db.delete(existing_category)
+    bump_version(db, "categories")
     db.commit()
+
+    catalog_cache.invalidate("categories", f"products:category:{category_id}")
     return None
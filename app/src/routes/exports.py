@@ -0,0 +1,35 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.src.core.security import required_role
+from app.src.db.database import SessionLocal
+from app.src.services.export_service import export_table
+
+router = APIRouter(tags=['Export'])
+
+
+@router.get('/admin/export/{table}')
+def export(
+    table: Literal["products", "inventory", "orders", "order_items"],
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    gzip: bool = Query(False),
+    after: int | None = Query(None, description="Resume after this primary key"),
+    current_user: dict = Depends(required_role('admin'))
+):
+    # the session lives as long as the stream, not the request handler
+    def stream():
+        db = SessionLocal()
+        try:
+            yield from export_table(db, table, format, after, gzip)
+        finally:
+            db.close()
+
+    file_name = f"{table}.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else ("text/csv" if format == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
@@ -1,27 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import tempfile
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.src.schemas.inventory import InventoryUpdate as InventorySchema, InventoryResponse
-from app.src.db.database import get_db
-from app.src.core.security import required_role
-from app.src.models.user import User
+from app.src.schemas.inventory import InventoryUpdate as InventorySchema, InventoryPage, InventoryListItem
+from app.src.db.database import get_db, SessionLocal
+from app.src.core.security import required_role, user_from_token
+from app.src.security.manager import AdminManager
 from app.src.models.inventory import Inventory
 from app.src.models.products import Product
-from app.src.utils.exceptions import UnauthorizedException
+from app.src.models.category import Category
+from app.src.services.stock_counters import stock_counters
+from app.src.services.stock_alerts import is_low, record_on_commit
+from app.src.services.inventory_service import InventoryBulkUpdater, iter_entries, iter_ndjson_entries
+from app.src.utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter(tags=['Inventory'])
 
 @router.get(
     "/admin/inventory",
-    response_model=list[InventoryResponse]
+    response_model=InventoryPage
 )
 def get_inventory(
+    category_id: int | None = Query(None),
+    max_stock: int | None = Query(None, ge=0, description="Only rows with stock_quantity <= max_stock"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None),
     db: Session = Depends(get_db),
     current_user: dict = Depends(required_role("admin"))
 ):
-    inventory = db.query(Inventory).all()
-    if not inventory:
-        raise HTTPException(status_code=404, detail="Inventory is empty")
-    return inventory
+    # Inventory + product + category in one query, keyset-paginated on product_id.
+    # A category filter walks ix_products_category_id_id; a max_stock up to
+    # LOW_STOCK_INDEX_THRESHOLD walks the partial ix_inventory_low_stock.
+    query = (
+        db.query(
+            Inventory.inventory_id, Inventory.product_id, Product.name.label("product_name"), Product.price,
+            Category.id.label("category_id"), Category.name.label("category_name"),
+            Inventory.stock_quantity, Inventory.sharded, Inventory.low_stock_threshold
+        )
+        .join(Product, Product.id == Inventory.product_id)
+        .join(Category, Category.id == Product.category_id)
+    )
+    if category_id is not None:
+        query = query.filter(Product.category_id == category_id)
+    if max_stock is not None:
+        query = query.filter(Inventory.stock_quantity <= max_stock)
+    if cursor:
+        values = decode_cursor(cursor, "inventory")
+        if len(values) != 1 or not isinstance(values[0], int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(Inventory.product_id > values[0])
+
+    rows = query.order_by(Inventory.product_id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor("inventory", [rows[-1].product_id])
+
+    return InventoryPage(
+        items=[InventoryListItem.model_validate(row._mapping) for row in rows],
+        next_cursor=next_cursor
+    )
+
+
+@router.websocket("/admin/inventory/ws")
+async def stock_alert_updates(websocket: WebSocket, token: str):
+    # pushes {"type": "stock_alerts", "alerts": [...]} as products cross their low-stock threshold
+    try:
+        user = user_from_token(token)
+    except HTTPException:
+        user = None
+    if user is None or user['role'] != "admin":
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await AdminManager.connect(user['id'], websocket)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        AdminManager.disconnect(user['id'])
 
 
 @router.put('/admin/inventory/{product_id}', response_model=InventorySchema)
@@ -38,14 +98,72 @@ def update_inventory(
     
     if payload.stock_quantity < 0:
         raise HTTPException(status_code=400, detail="Stock cannot be negative")
+
+    if payload.sharded and not stock_counters.shared:
+        raise HTTPException(status_code=400, detail="Sharded stock requires STOCK_COUNTER_STORE to be a redis:// url")
     
+    was_low = is_low(db_inventory.stock_quantity, db_inventory.low_stock_threshold)
     db_inventory.stock_quantity = payload.stock_quantity
+    if payload.sharded is not None:
+        db_inventory.sharded = payload.sharded
+    if payload.low_stock_threshold is not None:
+        db_inventory.low_stock_threshold = payload.low_stock_threshold
+    record_on_commit(db, product_id, was_low, db_inventory.stock_quantity, db_inventory.low_stock_threshold)
     db.commit()
     db.refresh(db_inventory)
+
+    # shards follow the new stock level: redistributed evenly, or dropped when unflagged
+    if db_inventory.sharded:
+        stock_counters.distribute(product_id, db_inventory.stock_quantity)
+    else:
+        stock_counters.unshard(product_id)
     return db_inventory
 
 
 
+@router.post('/admin/inventory/bulk')
+async def bulk_update_inventory(
+    request: Request,
+    current_user: dict = Depends(required_role("admin"))
+):
+    # Body: a JSON list, or NDJSON (one entry per line) for syncs too big for one document.
+    # The NDJSON body is spooled as it arrives, then applied chunk by chunk while the
+    # response streams back one NDJSON outcome per entry and a summary.
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        body = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        entries = iter_ndjson_entries(body)
+    else:
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON list or NDJSON")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON list or NDJSON")
+        body = None
+        entries = iter_entries(payload)
+
+    def events():
+        db = SessionLocal()
+        try:
+            # outcomes go out in blocks, not one write per entry
+            lines = []
+            for event in InventoryBulkUpdater(db).run(entries):
+                lines.append(json.dumps(event) + "\n")
+                if len(lines) >= 1000:
+                    yield "".join(lines)
+                    lines = []
+            yield "".join(lines)
+        finally:
+            db.close()
+            if body is not None:
+                body.close()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 @router.delete('/admin/inventory/{product_id}')
 def delete_inventory(
     product_id: int,
@@ -63,5 +181,6 @@ def delete_inventory(
 
     db.delete(inventory)
     db.commit()
+    stock_counters.unshard(product_id)
     
     return {"message": "Inventory record deleted successfully"}
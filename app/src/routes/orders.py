@@ -1,86 +1,161 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query, Header, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Literal, Optional
 
 from app.src.db.database import get_db
-from app.src.core.security import get_current_user
+from app.src.core.security import get_current_user, user_from_token
 from app.src.models.orders import Order, OrderItem
-from app.src.models.cart import Cart, CartItem
 from app.src.models.products import Product
-from app.src.schemas.orders import OrderOut, OrderCreate
+from app.src.schemas.orders import OrderOut, OrderCreate, OrderAccepted, OrderPage, OrderSummaryPage
+from app.src.security.manager import Manager
+from app.src.services.version_service import get_version
+from app.src.services.order_service import create_order, enqueue_order, load_order, paginate_orders
+from app.src.services.order_queue import order_queue
+from app.src.services.idempotency_service import idempotent_response, request_fingerprint
+from app.src.services.stock_service import cancel_order
+from app.src.utils.http_cache import PRIVATE_CACHE_CONTROL, make_etag, cache_headers, is_not_modified, not_modified_response
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 
 
-@router.post("/", response_model=OrderOut, status_code=status.HTTP_201_CREATED)
-def place_order(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    cart = db.query(Cart).filter(Cart.user_id == current_user['id']).first()
-    if not cart or not cart.items:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cart is empty"
+@router.post(
+    "/",
+    response_model=OrderOut,
+    status_code=status.HTTP_201_CREATED,
+    responses={202: {"model": OrderAccepted, "description": "Order queued (mode=async)"}}
+)
+def place_order(
+    mode: Literal["sync", "async"] = Query("sync"),
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    def handler():
+        if mode == "sync":
+            order = create_order(db, current_user['id'])
+            return JSONResponse(
+                status_code=status.HTTP_201_CREATED,
+                content=jsonable_encoder(OrderOut.model_validate(order))
+            )
+
+        # async: the worker pool does the checkout; poll GET /orders/{id} or listen on /orders/ws
+        order = enqueue_order(db, current_user['id'])
+        order_queue.submit(order.id)
+        accepted = OrderAccepted(order_id=order.id, status=order.status, status_url=f"/orders/{order.id}")
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=accepted.model_dump(),
+            headers={"Location": accepted.status_url}
         )
 
-    # Calculate total and prepare order items
-    total_price = 0.0
-    order_items_data = []
-
-    for cart_item in cart.items:
-        item_total = cart_item.product.price * cart_item.quantity
-        total_price += item_total
-        
-        order_items_data.append({
-            "product_id": cart_item.product_id,
-            "quantity": cart_item.quantity,
-            "price": cart_item.product.price
-        })
-
-    # Create Order
-    new_order = Order(
-        user_id=current_user['id'],
-        total_price=total_price,
-        status="pending"
+    # retries with the same Idempotency-Key replay the first response instead of placing another order
+    return idempotent_response(
+        db, idempotency_key, f"orders:{current_user['id']}", request_fingerprint("POST /orders", mode), handler
     )
-    db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
-
-    # Create OrderItems
-    for item_data in order_items_data:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            product_id=item_data["product_id"],
-            quantity=item_data["quantity"],
-            price=item_data["price"]
-        )
-        db.add(order_item)
-    
-    # Clear Cart
-    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-    
-    db.commit()
-    db.refresh(new_order) 
-    
-    return new_order
 
 
+@router.websocket("/ws")
+async def order_updates(websocket: WebSocket, token: str):
+    # pushes {"type": "order", "order_id", "status"} when a queued order is processed,
+    # by whichever worker process ran it (order_push polls the orders table)
+    try:
+        user = user_from_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await Manager.connect(user['id'], websocket)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        Manager.disconnect(user['id'])
+
+
+@router.post("/{order_id}/cancel", response_model=OrderOut)
+def cancel_pending_order(order_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    # releases the order's stock reservation
+    cancel_order(db, order_id, current_user['id'])
+    return load_order(db, order_id)
+
+
+
+
+def _latest(*timestamps):
+    present = [ts for ts in timestamps if ts is not None]
+    return max(present) if present else None
+
+
+@router.get(
+    "/",
+    response_model=OrderPage,
+    responses={200: {"description": "OrderSummaryPage (no line items) when summary=true"}}
+)
+def get_orders(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    summary: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    # Version marker for this user's orders, read from the (user_id, updated_at) index only.
+    # Line items embed product data, so the products version is folded into the ETag too.
+    count, last_update = (
+        db.query(func.count(Order.id), func.max(Order.updated_at))
+        .filter(Order.user_id == current_user['id'])
+        .one()
+    )
+    products_version, products_updated_at = get_version(db, "products")
+
+    last_modified = _latest(last_update, products_updated_at)
+    headers = cache_headers(
+        make_etag("orders", current_user['id'], count, last_update, products_version, limit, cursor, summary),
+        last_modified,
+        PRIVATE_CACHE_CONTROL
+    )
+    if is_not_modified(request, headers["ETag"], last_modified):
+        return not_modified_response(headers)
 
+    query = db.query(Order).filter(Order.user_id == current_user['id'])
+    if not summary:
+        # items and their products in two batched queries, whatever the page size
+        query = query.options(selectinload(Order.items).joinedload(OrderItem.product))
+    orders, next_cursor = paginate_orders(query, limit, cursor)
 
-@router.get("/", response_model=List[OrderOut])
-def get_orders(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    orders = db.query(Order).filter(Order.user_id == current_user['id']).order_by(Order.created_at.desc()).all()
-    return orders
+    page = (OrderSummaryPage if summary else OrderPage)(items=orders, next_cursor=next_cursor)
+    return Response(content=page.model_dump_json(), media_type="application/json", headers=headers)
 
 
 
 
 @router.get("/{order_id}", response_model=OrderOut)
-def get_order(order_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    order = db.query(Order).filter(Order.id == order_id, Order.user_id == current_user['id']).first()
-    if not order:
+def get_order(order_id: int, request: Request, response: Response, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    marker = (
+        db.query(Order.updated_at)
+        .filter(Order.id == order_id, Order.user_id == current_user['id'])
+        .first()
+    )
+    if not marker:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
+
+    products_version, products_updated_at = get_version(db, "products")
+    last_modified = _latest(marker.updated_at, products_updated_at)
+    headers = cache_headers(
+        make_etag("order", order_id, marker.updated_at, products_version),
+        last_modified,
+        PRIVATE_CACHE_CONTROL
+    )
+    if is_not_modified(request, headers["ETag"], last_modified):
+        return not_modified_response(headers)
+
+    order = db.query(Order).filter(Order.id == order_id).first()
+    response.headers.update(headers)
     return order
@@ -1,52 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from typing import Optional
 from sqlalchemy.orm import Session
 
+from app.src.core.config import PAYMENT_PROVIDER, PAYMENT_WEBHOOK_SECRET
+from app.src.core.security import get_current_user
 from app.src.db.database import get_db
 from app.src.schemas.payments import CreatePaymentIntent
-from app.src.models.orders import Order
-from app.src.models.payments import Payment
+from app.src.services import payment_service
+from app.src.services.idempotency_service import idempotent_response, request_fingerprint
+from app.src.services.webhook_service import verify_signature, webhook_inbox
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
 @router.post("/create-intent")
 def create_payment_intent(
     payload: CreatePaymentIntent,
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
 ):
-    # 1. Get the order
-    order = db.query(Order).filter(Order.id == payload.order_id).first()
-
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found"
-        )
-
-    # 2. Check if payment already exists
-    existing_payment = (
-        db.query(Payment)
-        .filter(Payment.order_id == order.id)
-        .first()
+    return idempotent_response(
+        db, idempotency_key, f"payments:{current_user['id']}",
+        request_fingerprint("POST /payments/create-intent", payload.model_dump()),
+        lambda: _create_payment_intent(payload, current_user['id'], db)
     )
 
-    if existing_payment:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Order already paid"
-        )
-
-    # 3. Create payment
-    new_payment = Payment(
-        order_id=order.id,
-        amount=order.total_price,
-        currency=payload.currency
-    )
 
-    db.add(new_payment)
-    db.commit()
-    db.refresh(new_payment)
+def _create_payment_intent(payload: CreatePaymentIntent, user_id: int, db: Session):
+    payment, client_secret = payment_service.create_payment_intent(db, payload.order_id, user_id, payload.currency)
 
-    return {
+    return JSONResponse(content={
         "message": "Payment created successfully",
-        "payment_id": new_payment.id
-    }
+        "payment_id": payment.id,
+        "client_secret": client_secret
+    })
+
+
+@router.post("/webhook")
+async def payment_webhook(request: Request, stripe_signature: Optional[str] = Header(None)):
+    # Verify, store in the inbox (deduplicated by event id) and acknowledge; the
+    # webhook applier updates payments and orders from the inbox separately.
+    if not PAYMENT_WEBHOOK_SECRET:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Webhooks are not configured")
+
+    payload = await request.body()
+    verify_signature(payload, stripe_signature, PAYMENT_WEBHOOK_SECRET)
+
+    try:
+        event = json.loads(payload)
+        intent = event.get("data", {}).get("object", {})
+        row = {
+            "provider": PAYMENT_PROVIDER,
+            "event_id": str(event["id"]),
+            "event_type": str(event["type"]),
+            "intent_id": intent.get("id") if isinstance(intent, dict) else None,
+            "payload": payload.decode(),
+            "event_created_at": datetime.utcfromtimestamp(int(event["created"])),
+        }
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed event")
+
+    try:
+        await asyncio.wait_for(asyncio.wrap_future(webhook_inbox.append(row)), timeout=10)
+    except Exception:
+        # not stored: a non-2xx makes the provider redeliver
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Event could not be stored")
+
+    return {"received": True}
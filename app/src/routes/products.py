@@ -1,26 +1,163 @@
-import os
-import uuid
-from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File
+import json
+import zipfile
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from app.src.db.database import get_db
+from app.src.db.database import get_db, SessionLocal
 from app.src.models.user import User as UserModel
 from app.src.core.security import required_role
-from app.src.schemas.products import ProductCreate, ProductUpdate, ProductResponse
+from app.src.schemas.products import ProductCreate, ProductUpdate, ProductResponse, ProductPage, ProductSuggestion
 from app.src.models.products import Product as ProductModel
 from app.src.models.category import Category as CategoryModel
 from app.src.models.inventory import Inventory as InventoryModel
+from app.src.utils.pagination import encode_cursor, decode_cursor, cursor_key
+from app.src.services.catalog_cache import catalog_cache, product_tags, bump_product_versions
+from app.src.services.version_service import get_version
+from app.src.services.search_service import search_backend
+from app.src.services.suggest_service import suggest_index, MAX_SUGGESTIONS
+from app.src.services.image_service import save_upload, release_image, collect_orphan_images
+from app.src.services.image_derivatives import schedule_derivatives
+from app.src.services.import_service import ProductImporter, detect_format, iter_rows
+from app.src.utils.http_cache import CATALOG_CACHE_CONTROL, make_etag, cache_headers, is_not_modified, not_modified_response
 
 router = APIRouter(tags=['Products'])
 
-PRODUCT_IMAGES_PATH = "app/static/product_images"
-os.makedirs(PRODUCT_IMAGES_PATH, exist_ok=True)
+PRODUCT_SORTS = {
+    # sort name -> (keyset columns, descending)
+    "id": ((ProductModel.id,), False),
+    "price_asc": ((ProductModel.price, ProductModel.id), False),
+    "price_desc": ((ProductModel.price, ProductModel.id), True),
+}
+
+
+def render_products_page(
+    db: Session,
+    limit: int = 20,
+    cursor: str | None = None,
+    category_id: int | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    sort: str = "id"
+) -> bytes:
+    columns, descending = PRODUCT_SORTS[sort]
+    query = db.query(ProductModel)
+
+    if category_id is not None:
+        query = query.filter(ProductModel.category_id == category_id)
+    if min_price is not None:
+        query = query.filter(ProductModel.price >= min_price)
+    if max_price is not None:
+        query = query.filter(ProductModel.price <= max_price)
+
+    # Keyset pagination: seek past the last row of the previous page instead of OFFSET,
+    # so page N costs the same as page 1
+    if cursor:
+        values = cursor_key(decode_cursor(cursor, sort), tuple(col.type.python_type for col in columns))
+        key = tuple_(*columns)
+        query = query.filter(key < values if descending else key > values)
+
+    query = query.order_by(*[col.desc() if descending else col.asc() for col in columns])
+
+    # fetch one extra row to know whether another page exists
+    products = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        last = products[-1]
+        next_cursor = encode_cursor(sort, [getattr(last, col.key) for col in columns])
+
+    page = ProductPage(items=products, next_cursor=next_cursor)
+    return page.model_dump_json().encode("utf-8")
+
+
+def products_page_tag(category_id: int | None) -> str:
+    # a category listing only changes with its own products, the unfiltered one with any
+    return f"products:category:{category_id}" if category_id is not None else "products:all"
+
+
+def products_page_cache_key(version, limit, cursor, category_id, min_price, max_price, sort):
+    # the tag's version is part of the key, so a worker never serves a page older than the data
+    key = ("products", version, limit, cursor, category_id, min_price, max_price, sort)
+    return key, [products_page_tag(category_id)]
+
+
+@router.get('/products', response_model=ProductPage)
+def get_products(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    category_id: int | None = Query(None),
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    sort: Literal["id", "price_asc", "price_desc"] = Query("id"),
+    db: Session = Depends(get_db)
+):
+    # Conditional GET: the ETag is derived from the listing's version marker and the query,
+    # so a matching If-None-Match is answered before any product row is read
+    version, updated_at = get_version(db, products_page_tag(category_id))
+    etag = make_etag("products", version, limit, cursor, category_id, min_price, max_price, sort)
+    headers = cache_headers(etag, updated_at, CATALOG_CACHE_CONTROL)
+    if is_not_modified(request, etag, updated_at):
+        return not_modified_response(headers)
+
+    key, tags = products_page_cache_key(version, limit, cursor, category_id, min_price, max_price, sort)
+    body = catalog_cache.get_or_load(
+        key, tags,
+        lambda: render_products_page(db, limit, cursor, category_id, min_price, max_price, sort)
+    )
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get('/products/search', response_model=ProductPage)
+def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    category_id: int | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    db: Session = Depends(get_db)
+):
+    # results are ranked by (score, id) descending and paged by that key
+    after = None
+    if cursor:
+        after = cursor_key(decode_cursor(cursor, "search"), (float, int))
+
+    hits = search_backend.search(db, q, category_id, limit + 1, after)
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor("search", list(hits[-1]))
+
+    ids = [product_id for _, product_id in hits]
+    products = {p.id: p for p in db.query(ProductModel).filter(ProductModel.id.in_(ids)).all()} if ids else {}
+
+    return {"items": [products[i] for i in ids if i in products], "next_cursor": next_cursor}
+
+
+@router.get('/products/suggest', response_model=list[ProductSuggestion])
+def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(MAX_SUGGESTIONS, ge=1, le=MAX_SUGGESTIONS)
+):
+    # answered entirely from the in-memory prefix index, no database session
+    body = json.dumps(suggest_index.suggest(q, limit), separators=(",", ":")).encode("utf-8")
+    return Response(content=body, media_type="application/json")
+
+
+def warm_products_cache(db: Session):
+    # prime the first page of the default listing and of every category listing
+    version, _ = get_version(db, products_page_tag(None))
+    key, tags = products_page_cache_key(version, 20, None, None, None, None, "id")
+    catalog_cache.get_or_load(key, tags, lambda: render_products_page(db))
+
+    for (category_id,) in db.query(CategoryModel.id).all():
+        version, _ = get_version(db, products_page_tag(category_id))
+        key, tags = products_page_cache_key(version, 20, None, category_id, None, None, "id")
+        catalog_cache.get_or_load(key, tags, lambda: render_products_page(db, category_id=category_id))
 
-@router.get('/products', response_model=list[ProductResponse])
-def get_products(db: Session = Depends(get_db)):
-    products = db.query(ProductModel).all()
-    if not products:
-        return []
-    return products
 
 
 @router.post('/admin/add-product', response_model=ProductResponse)
@@ -45,19 +182,9 @@ def add_product(
         raise HTTPException(status_code=400, detail='Product with this name already exists')
 
 
-    # save image
-    file_ext = image.filename.split('.')[-1]
-    file_name = f"{uuid.uuid4()}.{file_ext}"
-    file_path = os.path.join(PRODUCT_IMAGES_PATH, file_name)
-    
-    
-    with open(file_path, 'wb') as f:
-        f.write(image.file.read())
-        
-    
-    image_path = f"/static/product_images/{file_name}"
+    # save image (streamed, stored under its content hash)
+    image_path = save_upload(image)
 
-    
     new_product = ProductModel(
         name=name,
         description=description,
@@ -76,8 +203,14 @@ def add_product(
         stock_quantity=stock_quantity
     )
     db.add(new_inventory)
+    bump_product_versions(db, category_id)
     db.commit()
 
+    catalog_cache.invalidate(*product_tags(category_id))
+    search_backend.index_product(new_product)
+    suggest_index.add_product(new_product.id, new_product.name)
+    schedule_derivatives(new_product.image_path)
+
     return new_product
 
 
@@ -101,6 +234,8 @@ def update_product(
     if not existing_product:
         raise HTTPException(status_code=404, detail='Product not found')
 
+    old_category_id = existing_product.category_id
+
     # Validate category if provided
     if category_id is not None:
         category = db.query(CategoryModel).filter(
@@ -125,18 +260,24 @@ def update_product(
         existing_product.category_id = category_id
 
     # Handle image update
+    old_image_path = existing_product.image_path
     if image:
-        filename = f"{uuid.uuid4()}_{image.filename}"
-        file_path = os.path.join(PRODUCT_IMAGES_PATH, filename)
-
-        with open(file_path, "wb") as f:
-            f.write(image.file.read())
-
-        existing_product.image_path = f"/static/product_images/{filename}"
+        existing_product.image_path = save_upload(image)
+        existing_product.thumbnail_path = None
+        existing_product.image_variants = None
 
+    bump_product_versions(db, old_category_id, existing_product.category_id)
     db.commit()
     db.refresh(existing_product)
 
+    if existing_product.image_path != old_image_path:
+        release_image(db, old_image_path)
+        schedule_derivatives(existing_product.image_path)
+
+    catalog_cache.invalidate(*product_tags(old_category_id, existing_product.category_id))
+    search_backend.index_product(existing_product)
+    suggest_index.add_product(existing_product.id, existing_product.name)
+
     return existing_product
 
 
@@ -160,17 +301,62 @@ def delete_product(
     if inventory:
         db.delete(inventory)
 
-    # Delete image file from disk
-    if product.image_path:
-        # "/static/product_images/x.webp" → "app/static/product_images/x.webp"
-        file_path = product.image_path.lstrip("/")
-        file_path = os.path.join("app", file_path)
-
-        if os.path.exists(file_path):
-            os.remove(file_path)
-
     # Delete product
+    category_id = product.category_id
+    image_path = product.image_path
     db.delete(product)
+    bump_product_versions(db, category_id)
     db.commit()
 
+    # Delete image file from disk once no other product shares it
+    release_image(db, image_path)
+
+    catalog_cache.invalidate(*product_tags(category_id))
+    search_backend.remove_product(product_id)
+    suggest_index.remove_product(product_id)
+
     return {"message": "Product deleted successfully"}
+
+
+
+@router.post('/admin/images/gc')
+def collect_images(
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(required_role('admin'))
+):
+    removed = collect_orphan_images(db)
+    return {"message": "Orphaned images removed", "removed": removed}
+
+
+
+@router.post('/admin/products/import')
+def import_products(
+    file: UploadFile = File(...),
+    images: UploadFile | None = File(
+        None, description="Optional zip of images; a row's `image` names a file in it or an existing image_path, "
+                          "and rows without one get a placeholder image"
+    ),
+    format: Literal["csv", "ndjson"] | None = Form(None),
+    current_user: dict = Depends(required_role('admin'))
+):
+    fmt = detect_format(file.filename, format)
+
+    archive = None
+    if images is not None:
+        try:
+            archive = zipfile.ZipFile(images.file)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="images must be a zip archive")
+
+    # Rows are parsed, validated and committed while the response streams back one
+    # NDJSON event per rejected row, per committed batch and a final summary.
+    def events():
+        db = SessionLocal()
+        try:
+            importer = ProductImporter(db, archive)
+            for event in importer.run(iter_rows(file.file, fmt)):
+                yield json.dumps(event) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from app.src.schemas.products import ProductResponse
 
 class CartItemBase(BaseModel):
@@ -12,6 +12,14 @@ class CartItemCreate(CartItemBase):
 class CartItemUpdate(BaseModel):
     quantity: int
 
+class CartOperation(BaseModel):
+    op: Literal['add', 'set', 'remove']
+    product_id: int
+    quantity: int = 1
+
+class CartBatchUpdate(BaseModel):
+    operations: List[CartOperation] = Field(min_length=1, max_length=500)
+
 class CartItemRead(BaseModel):
     item_id: int = Field(validation_alias='id')
     product_id: int
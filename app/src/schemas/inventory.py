@@ -1,15 +1,54 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
 
 class InventoryBase(BaseModel):
     stock_quantity: int
 
 class InventoryUpdate(BaseModel):
     stock_quantity: int
+    # flash-sale mode: stock is held in sharded counters (left unchanged when omitted)
+    sharded: Optional[bool] = None
+    # per-product low-stock alert level (left unchanged when omitted)
+    low_stock_threshold: Optional[int] = Field(None, ge=0)
 
 class InventoryResponse(BaseModel):
     inventory_id: int
     product_id: int
     stock_quantity: int
+    sharded: bool = False
+    low_stock_threshold: Optional[int] = None
 
     class Config:
         from_attributes = True
+
+
+class InventoryListItem(BaseModel):
+    inventory_id: int
+    product_id: int
+    product_name: str
+    price: float
+    category_id: int
+    category_name: str
+    stock_quantity: int
+    sharded: bool = False
+    low_stock_threshold: Optional[int] = None
+
+
+class InventoryPage(BaseModel):
+    items: List[InventoryListItem] = []
+    next_cursor: Optional[str] = None
+
+
+class InventoryBulkEntry(BaseModel):
+    # exactly one of stock_quantity (absolute) or delta (relative)
+    product_id: int
+    stock_quantity: Optional[int] = None
+    delta: Optional[int] = None
+
+    @model_validator(mode="after")
+    def one_change(self):
+        if (self.stock_quantity is None) == (self.delta is None):
+            raise ValueError("Provide exactly one of stock_quantity or delta")
+        if self.stock_quantity is not None and self.stock_quantity < 0:
+            raise ValueError("Stock cannot be negative")
+        return self
@@ -21,8 +21,46 @@ class OrderOut(BaseModel):
     user_id: int
     total_price: float
     status: str
+    failure_reason: Optional[str] = None
     created_at: datetime
     items: List[OrderItemSchema] = []
 
     class Config:
         from_attributes = True
+
+
+class OrderSummary(BaseModel):
+    # order history without line items
+    id: int
+    user_id: int
+    total_price: float
+    status: str
+    failure_reason: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class OrderPage(BaseModel):
+    items: List[OrderOut] = []
+    next_cursor: Optional[str] = None
+
+
+class OrderSummaryPage(BaseModel):
+    items: List[OrderSummary] = []
+    next_cursor: Optional[str] = None
+
+
+class AdminOrderPage(BaseModel):
+    items: List[OrderSummary] = []
+    next_cursor: Optional[str] = None
+    # planner estimate (Postgres) or a count capped at COUNT_ESTIMATE_CAP
+    estimated_total: int
+    total_is_estimate: bool
+
+
+class OrderAccepted(BaseModel):
+    order_id: int
+    status: str
+    status_url: str
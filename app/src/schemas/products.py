@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class ProductBase(BaseModel):
     name: str
@@ -17,9 +17,37 @@ class ProductUpdate(BaseModel):
     category_id: Optional[int] = None
     image_path: Optional[str] = None
 
+class ImageVariant(BaseModel):
+    width: int
+    format: str
+    url: str
+
 class ProductResponse(ProductBase):
     id: int
     image_path: str
+    thumbnail_path: Optional[str] = None
+    image_variants: Optional[List[ImageVariant]] = None
     
     class Config:
         from_attributes = True
+
+
+class ProductPage(BaseModel):
+    items: List[ProductResponse] = []
+    next_cursor: Optional[str] = None
+
+
+class ProductSuggestion(BaseModel):
+    id: int
+    name: str
+
+
+class ProductImportRow(BaseModel):
+    name: str = Field(min_length=1)
+    description: Optional[str] = None
+    price: float = Field(ge=0)
+    category_id: int
+    stock_quantity: int = Field(ge=0)
+    # file name inside the uploaded images zip, or the image_path of an already stored
+    # image; without one the product gets the placeholder image
+    image: Optional[str] = None
@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import WebSocket, WebSocketDisconnect,APIRouter
 
 router = APIRouter()
@@ -6,9 +8,11 @@ router = APIRouter()
 class ConnectionManager:
     def __init__(self):
         self.active_connections: dict[int, WebSocket] = {}
+        self.loop: asyncio.AbstractEventLoop | None = None
 
     async def connect(self, user_id: int, websocket: WebSocket):
         await websocket.accept()
+        self.loop = asyncio.get_running_loop()
         self.active_connections[user_id] = websocket
 
     def disconnect(self, user_id: int):
@@ -19,8 +23,21 @@ class ConnectionManager:
         if websocket:
             await websocket.send_text(message)
 
+    def send_threadsafe(self, user_id: int, message: str):
+        # for worker threads: schedules the send on the event loop that owns the sockets
+        if self.loop is None or user_id not in self.active_connections:
+            return
+        asyncio.run_coroutine_threadsafe(self.send_to_user(user_id, message), self.loop)
+
     async def broadcast(self, message: str):
-        for websocket in self.active_connections.values():
+        for websocket in list(self.active_connections.values()):
             await websocket.send_text(message)
 
-Manager = ConnectionManager()
\ No newline at end of file
+    def broadcast_threadsafe(self, message: str):
+        if self.loop is None or not self.active_connections:
+            return
+        asyncio.run_coroutine_threadsafe(self.broadcast(message), self.loop)
+
+Manager = ConnectionManager()
+# admin dashboards (low-stock alerts), kept apart so an admin's order socket isn't replaced
+AdminManager = ConnectionManager()
\ No newline at end of file
@@ -0,0 +1,89 @@
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.src.models.cart import Cart, CartItem
+from app.src.models.products import Product
+from app.src.schemas.cart import CartOperation
+
+
+def cart_total_subquery():
+    # SUM(quantity * price) for the outer Cart row, computed by the database
+    return (
+        select(func.coalesce(func.sum(CartItem.quantity * Product.price), 0.0))
+        .join(Product, Product.id == CartItem.product_id)
+        .where(CartItem.cart_id == Cart.id)
+        .correlate(Cart)
+        .scalar_subquery()
+    )
+
+
+def load_cart(db: Session, user_id: int) -> dict:
+    """
+    Loads a user's cart for CartRead in exactly two queries, regardless of size:
+    the cart row with its SQL-computed total, then all items joined to their products.
+    """
+    row = (
+        db.query(Cart, cart_total_subquery())
+        .options(selectinload(Cart.items).joinedload(CartItem.product))
+        .filter(Cart.user_id == user_id)
+        .populate_existing()
+        .first()
+    )
+
+    if not row:
+        return {'id': 0, 'user_id': user_id, 'items': [], 'total_price': 0.0}
+
+    cart, total_price = row
+    return {'id': cart.id, 'user_id': cart.user_id, 'items': cart.items, 'total_price': float(total_price)}
+
+
+def apply_cart_operations(db: Session, user_id: int, operations: list[CartOperation]):
+    """
+    Applies a batch of add/set/remove operations in a single transaction: one query
+    checks every referenced product, one loads the existing items, one commit.
+    The batch is rejected as a whole if any product does not exist.
+    """
+    wanted = {op.product_id for op in operations if op.op != 'remove'}
+    if wanted:
+        found = {product_id for (product_id,) in db.query(Product.id).filter(Product.id.in_(wanted))}
+        missing = sorted(wanted - found)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Products not found: {missing}")
+
+    cart = db.query(Cart).filter(Cart.user_id == user_id).first()
+    if not cart:
+        cart = Cart(user_id=user_id)
+        db.add(cart)
+        db.flush()
+
+    items = {
+        item.product_id: item
+        for item in db.query(CartItem).filter(CartItem.cart_id == cart.id)
+    }
+
+    # operations apply in order against the in-memory view, then flush once
+    for op in operations:
+        item = items.get(op.product_id)
+
+        if op.op == 'remove' or (op.op == 'set' and op.quantity <= 0):
+            if item is not None:
+                # an item added earlier in this same batch was never written
+                if item in db.new:
+                    db.expunge(item)
+                else:
+                    db.delete(item)
+                del items[op.product_id]
+            continue
+
+        if op.op == 'add' and op.quantity <= 0:
+            raise HTTPException(status_code=400, detail="Quantity to add must be positive")
+
+        if item is None:
+            item = CartItem(cart_id=cart.id, product_id=op.product_id, quantity=0)
+            db.add(item)
+            items[op.product_id] = item
+
+        item.quantity = item.quantity + op.quantity if op.op == 'add' else op.quantity
+
+    db.commit()
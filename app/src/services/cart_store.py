@@ -0,0 +1,284 @@
+import logging
+import threading
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.src.core.config import CART_STORE, CART_FLUSH_INTERVAL, CART_FLUSH_BATCH, CART_TTL, WEB_CONCURRENCY
+from app.src.db.database import SessionLocal
+from app.src.models.cart import Cart, CartItem
+from app.src.models.products import Product
+from app.src.schemas.cart import CartOperation
+from app.src.services.cart_service import load_cart, apply_cart_operations
+from app.src.services.kv_store import connect_kv, is_shared
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CartLine:
+    # same shape as CartItem for CartItemRead and checkout
+    id: int
+    product_id: int
+    product: Product
+    quantity: int
+
+
+class DatabaseCartStore:
+    """Carts read and written straight through the carts/cart_items tables."""
+
+    def read(self, db: Session, user_id: int) -> dict:
+        return load_cart(db, user_id)
+
+    def apply(self, db: Session, user_id: int, operations: list[CartOperation]):
+        apply_cart_operations(db, user_id, operations)
+
+    def item_product_id(self, db: Session, user_id: int, item_id: int) -> int | None:
+        row = (
+            db.query(CartItem.product_id)
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .filter(CartItem.id == item_id, Cart.user_id == user_id)
+            .first()
+        )
+        return row.product_id if row else None
+
+    def clear(self, db: Session, user_id: int):
+        # staged in the caller's transaction; checkout commits it with the order
+        cart_ids = db.query(Cart.id).filter(Cart.user_id == user_id)
+        db.query(CartItem).filter(CartItem.cart_id.in_(cart_ids)).delete(synchronize_session=False)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class KeyValueCartStore:
+    """
+    Active carts live in a key-value store as one hash per user
+    (product_id -> quantity, plus the "_cart_id" meta field). Browsing traffic only
+    touches the store. Changed carts are marked dirty and a background flusher writes
+    them behind to carts/cart_items in batches, many edits to one cart becoming a
+    single write. A cart missing from the store is read through from the database.
+
+    Item ids are product ids here (a cart has at most one line per product); the
+    row ids of cart_items are an internal detail of the write-behind.
+
+    The store must be shared by every worker (Redis). The in-process store only
+    works for a single worker, and get_cart_store falls back to the database store
+    when WEB_CONCURRENCY says there are more.
+    """
+
+    DIRTY_KEY = "carts:dirty"
+
+    def __init__(self, kv, flush_interval: float = 2.0, batch_size: int = 500, ttl: int = 86400):
+        self.kv = kv
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def read(self, db: Session, user_id: int) -> dict:
+        cart_id, quantities = self._load(db, user_id)
+        if not quantities:
+            return {'id': cart_id, 'user_id': user_id, 'items': [], 'total_price': 0.0}
+
+        products = {p.id: p for p in db.query(Product).filter(Product.id.in_(quantities))}
+        items = [
+            CartLine(id=product_id, product_id=product_id, product=products[product_id], quantity=quantity)
+            for product_id, quantity in sorted(quantities.items())
+            if product_id in products
+        ]
+        total_price = sum(item.quantity * item.product.price for item in items)
+        return {'id': cart_id, 'user_id': user_id, 'items': items, 'total_price': total_price}
+
+    def apply(self, db: Session, user_id: int, operations: list[CartOperation]):
+        wanted = {op.product_id for op in operations if op.op != 'remove'}
+        if wanted:
+            found = {product_id for (product_id,) in db.query(Product.id).filter(Product.id.in_(wanted))}
+            missing = sorted(wanted - found)
+            if missing:
+                raise HTTPException(status_code=404, detail=f"Products not found: {missing}")
+
+        if any(op.op == 'add' and op.quantity <= 0 for op in operations):
+            raise HTTPException(status_code=400, detail="Quantity to add must be positive")
+
+        # one single-field command per operation (HINCRBY/HSET/HDEL), never a
+        # read-modify-write of the hash, so concurrent edits to a cart all land
+        self._load(db, user_id)
+        key = self._key(user_id)
+        for op in operations:
+            field = str(op.product_id)
+            if op.op == 'remove' or (op.op == 'set' and op.quantity <= 0):
+                self.kv.hdel(key, field)
+            elif op.op == 'add':
+                self.kv.hincrby(key, field, op.quantity)
+            else:
+                self.kv.hset(key, mapping={field: op.quantity})
+        self._touch(user_id)
+
+    def item_product_id(self, db: Session, user_id: int, item_id: int) -> int | None:
+        _, quantities = self._load(db, user_id)
+        return item_id if item_id in quantities else None
+
+    def clear(self, db: Session, user_id: int):
+        # applied once the caller's transaction commits, so a failed checkout keeps the cart
+        if db.in_transaction():
+            db.info.setdefault("cart_clears", []).append((self, user_id))
+        else:
+            self.clear_now(user_id)
+
+    def clear_now(self, user_id: int):
+        key = self._key(user_id)
+        fields = [field for field in self.kv.hgetall(key) if not field.startswith("_")]
+        if fields:
+            self.kv.hdel(key, *fields)
+        self._touch(user_id)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cart-write-behind", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        # final flush so a graceful restart loses nothing
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        written = 0
+        while True:
+            user_ids = [int(user_id) for user_id in self.kv.spop(self.DIRTY_KEY, self.batch_size)]
+            if not user_ids:
+                return written
+            try:
+                self._write_batch(user_ids)
+            except Exception:
+                # put them back so the next round retries
+                self.kv.sadd(self.DIRTY_KEY, *user_ids)
+                raise
+            written += len(user_ids)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Cart write-behind flush failed")
+
+    def _write_batch(self, user_ids: list[int]):
+        snapshots = {}
+        for user_id in user_ids:
+            values = self.kv.hgetall(self._key(user_id))
+            # an expired/evicted key says nothing about the cart, never treat it as empty
+            if "_cart_id" in values:
+                snapshots[user_id] = self._parse(values)[1]
+        if not snapshots:
+            return
+        user_ids = list(snapshots)
+
+        db = SessionLocal()
+        try:
+            carts = {cart.user_id: cart for cart in db.query(Cart).filter(Cart.user_id.in_(user_ids))}
+            for user_id, quantities in snapshots.items():
+                if user_id not in carts and quantities:
+                    carts[user_id] = Cart(user_id=user_id)
+                    db.add(carts[user_id])
+            db.flush()
+
+            cart_ids = {cart.id: user_id for user_id, cart in carts.items()}
+            existing = {
+                (item.cart_id, item.product_id): item
+                for item in db.query(CartItem).filter(CartItem.cart_id.in_(cart_ids))
+            }
+
+            new_items = []
+            for cart_id, user_id in cart_ids.items():
+                quantities = snapshots[user_id]
+                for product_id, quantity in quantities.items():
+                    item = existing.pop((cart_id, product_id), None)
+                    if item is None:
+                        new_items.append({"cart_id": cart_id, "product_id": product_id, "quantity": quantity})
+                    elif item.quantity != quantity:
+                        item.quantity = quantity
+
+            for item in existing.values():
+                db.delete(item)
+            if new_items:
+                db.bulk_insert_mappings(CartItem, new_items)
+            db.commit()
+
+            for user_id, cart in carts.items():
+                self.kv.hset(self._key(user_id), mapping={"_cart_id": cart.id})
+        finally:
+            db.close()
+
+    def _load(self, db: Session, user_id: int) -> tuple[int, dict[int, int]]:
+        key = self._key(user_id)
+        values = self.kv.hgetall(key)
+        if "_cart_id" in values:
+            return self._parse(values)
+
+        # read-through from the tables
+        cart = db.query(Cart).filter(Cart.user_id == user_id).first()
+        cart_id = cart.id if cart else 0
+        quantities = {}
+        if cart:
+            quantities = {
+                product_id: quantity
+                for product_id, quantity in db.query(CartItem.product_id, CartItem.quantity).filter(CartItem.cart_id == cart.id)
+            }
+        # HSETNX: edits that landed since this read-through began are not overwritten
+        for field, value in {"_cart_id": cart_id, **{str(k): v for k, v in quantities.items()}}.items():
+            self.kv.hsetnx(key, field, value)
+        self.kv.expire(key, self.ttl)
+        return cart_id, quantities
+
+    def _touch(self, user_id: int):
+        self.kv.expire(self._key(user_id), self.ttl)
+        self.kv.sadd(self.DIRTY_KEY, user_id)
+
+    @staticmethod
+    def _parse(values: dict) -> tuple[int, dict[int, int]]:
+        cart_id = int(values.get("_cart_id", 0))
+        quantities = {int(field): int(value) for field, value in values.items() if not field.startswith("_")}
+        return cart_id, quantities
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"cart:{user_id}"
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _clear_committed(session):
+    for store, user_id in session.info.pop("cart_clears", []):
+        store.clear_now(user_id)
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _drop_uncommitted(session, transaction):
+    # a rolled-back checkout keeps its cart, and the next commit on the session doesn't clear it
+    if transaction.parent is None:
+        session.info.pop("cart_clears", None)
+
+
+def get_cart_store():
+    kv = connect_kv(CART_STORE)
+    if kv is None:
+        return DatabaseCartStore()
+    if not is_shared(kv) and WEB_CONCURRENCY > 1:
+        # each worker would keep its own copy of a cart and flush over the others
+        logger.warning("CART_STORE=%s is not shared between %s workers, using the database store", CART_STORE, WEB_CONCURRENCY)
+        return DatabaseCartStore()
+    return KeyValueCartStore(kv, CART_FLUSH_INTERVAL, CART_FLUSH_BATCH, CART_TTL)
+
+
+cart_store = get_cart_store()
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.orm import Session
+
+from app.src.core.config import CATALOG_CACHE_MAX_ENTRIES, CATALOG_CACHE_TTL
+from app.src.services.version_service import bump_version
+
+
+class CatalogCache:
+    """
+    In-process read-through cache for public catalog reads.
+
+    Entries hold already-serialized JSON bytes so a hit skips both the database and
+    Pydantic. Every entry is registered under one or more tags (e.g. "categories",
+    "products:category:3") with a version marker of the same name, which writes bump
+    in their transaction. Keys carry the marker of their tag, so a product change
+    in category 3 moves only the category 3 and unfiltered listings to new keys,
+    in every worker; the local `invalidate` then drops the superseded entries right
+    away, and copies left in other workers are never looked up again and age out.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()   # key -> (expires_at, body, tags)
+        self._tags: dict[str, set] = {}              # tag -> keys
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, body: bytes, tags: list[str], generation: int | None = None):
+        with self._lock:
+            # an invalidation ran while this body was being built, so it may be stale
+            if generation is not None and generation != self._generation:
+                return
+
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + self.ttl, body, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_load(self, key, tags: list[str], loader) -> bytes:
+        body = self.get(key)
+        if body is not None:
+            return body
+
+        generation = self._generation
+        body = loader()
+        self.set(key, body, tags, generation)
+        return body
+
+    def invalidate(self, *tags: str):
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+catalog_cache = CatalogCache(max_entries=CATALOG_CACHE_MAX_ENTRIES, ttl=CATALOG_CACHE_TTL)
+
+
+def product_tags(*category_ids) -> list[str]:
+    # entries a product change can affect: unfiltered listings plus its category's listings
+    tags = ["products:all"]
+    for category_id in category_ids:
+        if category_id is not None:
+            tags.append(f"products:category:{category_id}")
+    return tags
+
+
+def bump_product_versions(db: Session, *category_ids):
+    # the table-wide marker (order ETags, index sync) plus one per affected listing tag,
+    # always in the same order so concurrent writers lock the marker rows alike
+    for name in ["products", *sorted(set(product_tags(*category_ids)))]:
+        bump_version(db, name)
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.src.core.config import EXPORT_YIELD_PER
+from app.src.models.inventory import Inventory
+from app.src.models.orders import Order, OrderItem
+from app.src.models.products import Product
+
+
+EXPORT_TABLES = {
+    "products": Product.__table__,
+    "inventory": Inventory.__table__,
+    "orders": Order.__table__,
+    "order_items": OrderItem.__table__,
+}
+
+CHUNK_BYTES = 64 * 1024
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def export_table(db: Session, name: str, fmt: str, after: int | None = None, compress: bool = False) -> Iterator[bytes]:
+    """
+    Streams a whole table ordered by primary key from a server-side cursor.
+
+    Rows are fetched EXPORT_YIELD_PER at a time and written out in ~64 KiB chunks,
+    so memory stays flat however large the table is. Passing the last exported key
+    as `after` resumes an interrupted export.
+    """
+    table = EXPORT_TABLES[name]
+    key = next(iter(table.primary_key.columns))
+
+    stmt = select(table).order_by(key)
+    if after is not None:
+        stmt = stmt.where(key > after)
+
+    result = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_YIELD_PER))
+    columns = list(result.keys())
+
+    # gzip container (wbits 16+) so the stream can be saved straight to a .gz file
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    if writer:
+        writer.writerow(columns)
+
+    for partition in result.partitions():
+        for row in partition:
+            if writer:
+                writer.writerow([
+                    json.dumps(value) if isinstance(value, (dict, list)) else _plain(value)
+                    for value in row
+                ])
+            else:
+                buffer.write(json.dumps(dict(zip(columns, map(_plain, row)))))
+                buffer.write("\n")
+
+        if buffer.tell() >= CHUNK_BYTES:
+            chunk = drain()
+            if chunk:
+                yield chunk
+
+    tail = drain()
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
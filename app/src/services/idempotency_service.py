@@ -0,0 +1,185 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.src.core.config import (
+    IDEMPOTENCY_TTL, IDEMPOTENCY_WAIT_TIMEOUT, IDEMPOTENCY_LOCK_TIMEOUT, IDEMPOTENCY_SWEEP_INTERVAL, IDEMPOTENCY_SWEEP_BATCH
+)
+from app.src.db.database import SessionLocal
+from app.src.models.idempotency import IdempotencyKey
+from app.src.utils.periodic import PeriodicTask
+
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADERS = ("location",)
+POLL_INTERVAL = 0.1
+
+# requests in flight in this process, so local duplicates wake up as soon as they finish
+_inflight: dict[tuple[str, str], threading.Event] = {}
+
+
+def request_fingerprint(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def idempotent_response(db: Session, key: str | None, scope: str, fingerprint: str, handler: Callable[[], Response]) -> Response:
+    """
+    Runs `handler` at most once per (scope, Idempotency-Key) and replays its stored
+    response to every retry for IDEMPOTENCY_TTL.
+
+    The key is claimed with an INSERT on the unique (scope, key) constraint before
+    the handler runs, so of two concurrent duplicates exactly one executes; the other
+    waits for it (up to IDEMPOTENCY_WAIT_TIMEOUT) and gets the same response. Reusing
+    a key for a different request is a 422. If the handler raises, the claim is
+    dropped and a retry executes again.
+
+    The claim is a lease stamped with locked_at. If the worker dies between the
+    handler's commit and storing the response, the key would stay in_progress until
+    it expires; once the lease is older than IDEMPOTENCY_LOCK_TIMEOUT a retry takes
+    the claim over and executes instead; the stale owner can then no longer
+    complete or drop it.
+    """
+    if key is None:
+        return handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Idempotency-Key")
+
+    claim = _claim(db, scope, key, fingerprint)
+    if isinstance(claim, Response):
+        return claim
+    locked_at = claim
+
+    done = _inflight[(scope, key)] = threading.Event()
+    try:
+        try:
+            response = handler()
+        except BaseException:
+            db.rollback()
+            _owned(db, scope, key, locked_at).delete(synchronize_session=False)
+            db.commit()
+            raise
+
+        headers = {name: value for name, value in response.headers.items() if name in REPLAYED_HEADERS}
+        _owned(db, scope, key, locked_at).update({
+            IdempotencyKey.status: "completed",
+            IdempotencyKey.response_status: response.status_code,
+            IdempotencyKey.response_body: response.body.decode(),
+            IdempotencyKey.response_headers: json.dumps(headers),
+        }, synchronize_session=False)
+        db.commit()
+        return response
+    finally:
+        _inflight.pop((scope, key), None)
+        done.set()
+
+
+def _record(db: Session, scope: str, key: str):
+    return db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+
+
+def _owned(db: Session, scope: str, key: str, locked_at: datetime):
+    # the claim, as long as it hasn't been taken over since
+    return _record(db, scope, key).filter(IdempotencyKey.status == "in_progress", IdempotencyKey.locked_at == locked_at)
+
+
+def _claim(db: Session, scope: str, key: str, fingerprint: str) -> Response | datetime:
+    # the lease's locked_at once this request owns the key, otherwise the response to replay
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_TIMEOUT
+    while True:
+        locked_at = datetime.utcnow()
+        db.add(IdempotencyKey(
+            scope=scope, key=key, fingerprint=fingerprint, locked_at=locked_at,
+            expires_at=locked_at + timedelta(seconds=IDEMPOTENCY_TTL)
+        ))
+        try:
+            db.commit()
+            return locked_at
+        except IntegrityError:
+            db.rollback()
+
+        record = _record(db, scope, key).populate_existing().first()
+        if record is None:
+            continue
+        if record.expires_at < datetime.utcnow():
+            # expired but not swept yet: the key is free again
+            _record(db, scope, key).delete(synchronize_session=False)
+            db.commit()
+            continue
+        if record.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        if record.status == "completed":
+            return Response(
+                content=record.response_body,
+                status_code=record.response_status,
+                media_type="application/json",
+                headers={**json.loads(record.response_headers or "{}"), "Idempotent-Replayed": "true"}
+            )
+
+        lease = record.locked_at or record.created_at
+        if lease < locked_at - timedelta(seconds=IDEMPOTENCY_LOCK_TIMEOUT):
+            # the owner crashed before storing its response; of several retries
+            # only the one whose UPDATE still sees the old lease takes over
+            same_lease = (
+                IdempotencyKey.locked_at.is_(None) if record.locked_at is None
+                else IdempotencyKey.locked_at == record.locked_at
+            )
+            taken = _record(db, scope, key).filter(IdempotencyKey.status == "in_progress", same_lease).update(
+                {IdempotencyKey.locked_at: locked_at}, synchronize_session=False
+            )
+            db.commit()
+            if taken:
+                return locked_at
+            continue
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        db.rollback()
+        inflight = _inflight.get((scope, key))
+        if inflight is not None:
+            inflight.wait(remaining)
+        else:
+            # in flight in another worker process
+            time.sleep(min(POLL_INTERVAL, remaining))
+
+
+def sweep_idempotency_keys(db: Session, batch_size: int = IDEMPOTENCY_SWEEP_BATCH) -> int:
+    # expired keys go in bounded DELETE ... WHERE id IN (SELECT ... LIMIT n) batches
+    deleted = 0
+    while True:
+        expired = (
+            select(IdempotencyKey.id)
+            .where(IdempotencyKey.expires_at < datetime.utcnow())
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        count = db.query(IdempotencyKey).filter(IdempotencyKey.id.in_(expired)).delete(synchronize_session=False)
+        db.commit()
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def _sweep():
+    db = SessionLocal()
+    try:
+        sweep_idempotency_keys(db)
+    finally:
+        db.close()
+
+
+idempotency_sweeper = PeriodicTask("idempotency-sweeper", IDEMPOTENCY_SWEEP_INTERVAL, _sweep)
@@ -0,0 +1,207 @@
+import argparse
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from app.src.core.config import IMAGE_DERIVATIVE_WIDTHS, IMAGE_DERIVATIVE_FORMATS, IMAGE_DERIVATIVE_WORKERS
+from app.src.db.database import SessionLocal
+from app.src.models.products import Product
+from app.src.services.image_service import (
+    PRODUCT_IMAGES_PATH, PRODUCT_IMAGES_URL, PRODUCT_DERIVED_PATH, PRODUCT_DERIVED_URL, image_disk_path
+)
+from app.src.services.catalog_cache import catalog_cache, product_tags, bump_product_versions
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTH = 160
+BACKFILL_CHECKPOINT = os.path.join(PRODUCT_DERIVED_PATH, ".backfill-checkpoint")
+
+_executor: ProcessPoolExecutor | None = None
+# originals being rendered -> whether another product asked for them meanwhile
+_inflight: dict[str, bool] = {}
+_inflight_lock = threading.Lock()
+
+
+def render_derivatives(source_path: str, widths: list[int], formats: list[str]) -> dict:
+    """
+    Runs in a worker process: writes every (width, format) variant of one original
+    next to the others in PRODUCT_DERIVED_PATH and returns their public urls.
+    Existing variants are kept, so re-running for the same file is cheap.
+    """
+    from PIL import Image, ImageOps, features
+
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    formats = [fmt for fmt in formats if features.check(fmt)]
+    os.makedirs(PRODUCT_DERIVED_PATH, exist_ok=True)
+
+    variants = []
+    thumbnail = None
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        for width in sorted({THUMBNAIL_WIDTH, *widths}):
+            # never upscale: widths past the original's collapse into one variant at its own size
+            if width > THUMBNAIL_WIDTH and variants and variants[-1]["width"] == image.width:
+                break
+            target = min(width, image.width)
+            height = max(1, round(image.height * target / image.width))
+            resized = None
+
+            for fmt in formats:
+                file_name = f"{stem}-{width}.{fmt}"
+                file_path = os.path.join(PRODUCT_DERIVED_PATH, file_name)
+                if not os.path.exists(file_path):
+                    if resized is None:
+                        resized = image.resize((target, height), Image.LANCZOS)
+                    # a unique temp file per render, so concurrent renders never share one
+                    fd, tmp_path = tempfile.mkstemp(dir=PRODUCT_DERIVED_PATH, prefix=f".{file_name}.", suffix=".tmp")
+                    try:
+                        with os.fdopen(fd, "wb") as tmp:
+                            resized.save(tmp, format=fmt.upper(), quality=80)
+                        os.replace(tmp_path, file_path)
+                    except BaseException:
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+                        raise
+
+                url = f"{PRODUCT_DERIVED_URL}/{file_name}"
+                if width == THUMBNAIL_WIDTH:
+                    if thumbnail is None:
+                        thumbnail = url
+                else:
+                    variants.append({"width": target, "format": fmt, "url": url})
+
+    return {"thumbnail_path": thumbnail, "image_variants": variants}
+
+
+def apply_derivatives(image_path: str, result: dict):
+    # every product sharing this (content-addressed) original gets the same variants
+    db = SessionLocal()
+    try:
+        category_ids = [
+            category_id for (category_id,) in
+            db.query(Product.category_id).filter(Product.image_path == image_path).distinct()
+        ]
+        updated = (
+            db.query(Product)
+            .filter(Product.image_path == image_path)
+            .update(
+                {Product.thumbnail_path: result["thumbnail_path"], Product.image_variants: result["image_variants"]},
+                synchronize_session=False
+            )
+        )
+        if updated:
+            bump_product_versions(db, *category_ids)
+        db.commit()
+    finally:
+        db.close()
+    if updated:
+        catalog_cache.invalidate(*product_tags(*category_ids))
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_DERIVATIVE_WORKERS)
+    return _executor
+
+
+def schedule_derivatives(image_path: str):
+    # called after the product commit; results land in the database when the pool is done.
+    # Identical uploads share one original, so a render already running for it is reused
+    # and its result applied once more for the products that arrived meanwhile.
+    with _inflight_lock:
+        if image_path in _inflight:
+            _inflight[image_path] = True
+            return
+        _inflight[image_path] = False
+
+    try:
+        future = _get_executor().submit(
+            render_derivatives, image_disk_path(image_path), IMAGE_DERIVATIVE_WIDTHS, IMAGE_DERIVATIVE_FORMATS
+        )
+    except Exception:
+        with _inflight_lock:
+            _inflight.pop(image_path, None)
+        raise
+
+    def on_done(done):
+        try:
+            result = done.result()
+            while True:
+                apply_derivatives(image_path, result)
+                with _inflight_lock:
+                    if not _inflight.get(image_path):
+                        _inflight.pop(image_path, None)
+                        return
+                    _inflight[image_path] = False
+        except Exception:
+            with _inflight_lock:
+                _inflight.pop(image_path, None)
+            logger.exception("Image derivatives failed for %s", image_path)
+
+    future.add_done_callback(on_done)
+
+
+def shutdown_derivatives():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def backfill(batch_size: int, workers: int, restart: bool = False):
+    """
+    Generates derivatives for everything already in PRODUCT_IMAGES_PATH.
+
+    Files are processed in name order, batch by batch across a process pool; the
+    last completed file name is checkpointed so an interrupted run resumes there.
+    """
+    os.makedirs(PRODUCT_DERIVED_PATH, exist_ok=True)
+
+    last_done = ""
+    if not restart and os.path.exists(BACKFILL_CHECKPOINT):
+        with open(BACKFILL_CHECKPOINT) as f:
+            last_done = f.read().strip()
+
+    names = sorted(
+        entry.name for entry in os.scandir(PRODUCT_IMAGES_PATH)
+        if entry.is_file() and not entry.name.startswith(".") and entry.name > last_done
+    )
+    print(f"Backfilling {len(names)} images" + (f" after {last_done}" if last_done else ""))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(names), batch_size):
+            batch = names[start:start + batch_size]
+            futures = [
+                pool.submit(
+                    render_derivatives, os.path.join(PRODUCT_IMAGES_PATH, name),
+                    IMAGE_DERIVATIVE_WIDTHS, IMAGE_DERIVATIVE_FORMATS
+                )
+                for name in batch
+            ]
+
+            for name, future in zip(batch, futures):
+                try:
+                    apply_derivatives(f"{PRODUCT_IMAGES_URL}/{name}", future.result())
+                except Exception as exp:
+                    print(f"Skipping {name}: {exp}")
+
+            with open(BACKFILL_CHECKPOINT, "w") as f:
+                f.write(batch[-1])
+            print(f"Processed {min(start + batch_size, len(names))}/{len(names)}")
+
+
+if __name__ == "__main__":
+    # python -m app.src.services.image_derivatives [--batch-size N] [--workers N] [--restart]
+    parser = argparse.ArgumentParser(description="Backfill product image derivatives")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=IMAGE_DERIVATIVE_WORKERS)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    args = parser.parse_args()
+
+    backfill(args.batch_size, args.workers, args.restart)
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.src.core.config import MAX_IMAGE_UPLOAD_BYTES
+from app.src.models.products import Product
+
+
+PRODUCT_IMAGES_PATH = "app/static/product_images"
+PRODUCT_IMAGES_URL = "/static/product_images"
+PRODUCT_DERIVED_PATH = os.path.join(PRODUCT_IMAGES_PATH, "derived")
+PRODUCT_DERIVED_URL = f"{PRODUCT_IMAGES_URL}/derived"
+# shown for products imported without an image; never reference counted or swept
+PLACEHOLDER_IMAGE_URL = "/static/placeholder.svg"
+CHUNK_SIZE = 64 * 1024
+
+# files younger than this are never swept: their product row may not be committed yet
+ORPHAN_GRACE_SECONDS = 15 * 60
+
+os.makedirs(PRODUCT_IMAGES_PATH, exist_ok=True)
+
+
+def image_disk_path(image_path: str) -> str:
+    # "/static/product_images/x.webp" → "app/static/product_images/x.webp"
+    return os.path.join("app", image_path.lstrip("/"))
+
+
+def remove_derivatives(file_name: str):
+    # thumbnails/responsive variants are named "<original stem>-<width>.<format>"
+    stem = os.path.splitext(file_name)[0]
+    if not os.path.isdir(PRODUCT_DERIVED_PATH):
+        return
+    with os.scandir(PRODUCT_DERIVED_PATH) as entries:
+        for entry in entries:
+            if entry.name.rsplit("-", 1)[0] == stem:
+                os.remove(entry.path)
+
+
+def save_upload(image: UploadFile) -> str:
+    return store_image(image.file, image.filename)
+
+
+def store_image(source: BinaryIO, filename: str | None) -> str:
+    """
+    Streams a file to disk in CHUNK_SIZE pieces and stores it under its sha256.
+
+    Memory stays constant per upload, identical images share one file, and the
+    returned public path is what goes into Product.image_path.
+    """
+    ext = re.sub(r"[^a-z0-9]", "", (filename or "").rsplit(".", 1)[-1].lower())[:10] or "bin"
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=PRODUCT_IMAGES_PATH, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_IMAGE_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Image exceeds {MAX_IMAGE_UPLOAD_BYTES} bytes"
+                    )
+                digest.update(chunk)
+                out.write(chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Image is empty")
+
+        file_name = f"{digest.hexdigest()}.{ext}"
+        file_path = os.path.join(PRODUCT_IMAGES_PATH, file_name)
+        if os.path.exists(file_path):
+            # already stored: dedupe, and refresh mtime so a concurrent release leaves it alone
+            os.remove(tmp_path)
+            os.utime(file_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return f"{PRODUCT_IMAGES_URL}/{file_name}"
+
+
+def release_image(db: Session, image_path: str | None):
+    # Reference counting is the number of products pointing at the file; call after the
+    # commit that dropped a reference and the file goes away with its last user.
+    if not image_path or not image_path.startswith(PRODUCT_IMAGES_URL + "/"):
+        return
+
+    if db.query(Product.id).filter(Product.image_path == image_path).first():
+        return
+
+    file_path = image_disk_path(image_path)
+    try:
+        # a fresh file may be about to gain a reference from an in-flight upload;
+        # leave it for collect_orphan_images
+        if os.stat(file_path).st_mtime > time.time() - ORPHAN_GRACE_SECONDS:
+            return
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+    remove_derivatives(os.path.basename(file_path))
+
+
+def collect_orphan_images(db: Session) -> int:
+    # Sweeps files no product references (failed commits, pre-dedupe uploads).
+    referenced = {
+        os.path.basename(path)
+        for (path,) in db.query(Product.image_path).execution_options(yield_per=1000)
+        if path
+    }
+
+    removed = 0
+    cutoff = time.time() - ORPHAN_GRACE_SECONDS
+    with os.scandir(PRODUCT_IMAGES_PATH) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name in referenced:
+                continue
+            if entry.stat().st_mtime > cutoff:
+                continue
+            os.remove(entry.path)
+            removed += 1
+
+    # derivatives whose original is gone
+    if os.path.isdir(PRODUCT_DERIVED_PATH):
+        stems = {os.path.splitext(name)[0] for name in os.listdir(PRODUCT_IMAGES_PATH)}
+        with os.scandir(PRODUCT_DERIVED_PATH) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith(".") and entry.name.rsplit("-", 1)[0] not in stems:
+                    os.remove(entry.path)
+                    removed += 1
+    return removed
@@ -0,0 +1,206 @@
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+from typing import BinaryIO, Iterator
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.src.core.config import IMPORT_BATCH_SIZE
+from app.src.models.category import Category
+from app.src.models.inventory import Inventory
+from app.src.models.products import Product
+from app.src.schemas.products import ProductImportRow
+from app.src.services.catalog_cache import catalog_cache, product_tags, bump_product_versions
+from app.src.services.image_derivatives import schedule_derivatives
+from app.src.services.image_service import store_image, image_disk_path, PRODUCT_IMAGES_URL, PLACEHOLDER_IMAGE_URL
+from app.src.services.search_service import search_backend
+from app.src.services.suggest_service import suggest_index
+
+
+def detect_format(filename: str | None, fmt: str | None) -> str:
+    if fmt:
+        return fmt
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    raise HTTPException(status_code=400, detail="Unknown import format, pass format=csv or format=ndjson")
+
+
+def iter_rows(source: BinaryIO, fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    # yields (row number, raw row, parse error); the file is read line by line, never whole
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            yield row_number, {key: (value if value != "" else None) for key, value in row.items() if key}, None
+        return
+
+    for row_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exp:
+            yield row_number, None, f"Invalid JSON: {exp}"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, "Row must be a JSON object"
+            continue
+        yield row_number, data, None
+
+
+class ProductImporter:
+    """
+    Validates rows as they stream in and inserts Product + Inventory rows in batches:
+    one multi-row INSERT per table and a single commit per IMPORT_BATCH_SIZE rows.
+
+    `run` yields NDJSON-ready events: one per rejected row, a progress event after
+    every committed batch and a final summary.
+    """
+
+    def __init__(self, db: Session, images: zipfile.ZipFile | None = None, batch_size: int = IMPORT_BATCH_SIZE):
+        self.db = db
+        self.images = images
+        self.batch_size = batch_size
+        self.category_ids = {category_id for (category_id,) in db.query(Category.id)}
+        self.seen_names: set[str] = set()
+        self.processed = 0
+        self.inserted = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def run(self, rows: Iterator[tuple[int, dict | None, str | None]]) -> Iterator[dict]:
+        batch: list[tuple[int, ProductImportRow]] = []
+
+        for row_number, data, error in rows:
+            self.processed += 1
+            if error is None:
+                try:
+                    row = ProductImportRow.model_validate(data)
+                except ValidationError as exp:
+                    error = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exp.errors())
+                else:
+                    error = self._check(row)
+
+            if error:
+                yield self._reject(row_number, error)
+                continue
+
+            self.seen_names.add(row.name)
+            batch.append((row_number, row))
+            if len(batch) >= self.batch_size:
+                yield from self._flush(batch)
+                batch = []
+
+        if batch:
+            yield from self._flush(batch)
+
+        yield {"type": "summary", **self._progress()}
+
+    def _check(self, row: ProductImportRow) -> str | None:
+        if row.category_id not in self.category_ids:
+            return "Category not found"
+        if row.name in self.seen_names:
+            return "Duplicate product name in file"
+        return None
+
+    def _reject(self, row_number: int, error: str) -> dict:
+        self.failed += 1
+        return {"type": "error", "row": row_number, "error": error}
+
+    def _flush(self, batch: list[tuple[int, ProductImportRow]]) -> Iterator[dict]:
+        names = [row.name for _, row in batch]
+        existing = {name for (name,) in self.db.query(Product.name).filter(Product.name.in_(names))}
+
+        values = []
+        accepted = []
+        for row_number, row in batch:
+            if row.name in existing:
+                yield self._reject(row_number, "Product with this name already exists")
+                continue
+            try:
+                image_path = self._image_path(row.image)
+            except HTTPException as exp:
+                yield self._reject(row_number, str(exp.detail))
+                continue
+
+            values.append({
+                "name": row.name,
+                "description": row.description,
+                "price": row.price,
+                "category_id": row.category_id,
+                "image_path": image_path,
+            })
+            accepted.append((row_number, row))
+
+        if not values:
+            yield {"type": "progress", **self._progress()}
+            return
+
+        try:
+            # multi-row INSERT ... RETURNING, ids come back in parameter order
+            product_ids = self.db.execute(
+                insert(Product).returning(Product.id, sort_by_parameter_order=True), values
+            ).scalars().all()
+            self.db.execute(insert(Inventory), [
+                {"product_id": product_id, "stock_quantity": row.stock_quantity}
+                for product_id, (_, row) in zip(product_ids, accepted)
+            ])
+            bump_product_versions(self.db, *{value["category_id"] for value in values})
+            self.db.commit()
+        except Exception as exp:
+            self.db.rollback()
+            for row_number, _ in accepted:
+                yield self._reject(row_number, f"Batch failed: {exp.__class__.__name__}")
+            yield {"type": "progress", **self._progress()}
+            return
+
+        self.inserted += len(product_ids)
+        self._after_commit(product_ids, values)
+        yield {"type": "progress", **self._progress()}
+
+    def _image_path(self, image: str | None) -> str:
+        # zip member first, then an image already stored by an earlier upload
+        if not image:
+            return PLACEHOLDER_IMAGE_URL
+        if self.images is not None:
+            try:
+                with self.images.open(image) as member:
+                    return store_image(member, image)
+            except KeyError:
+                pass
+        stored_name = image[len(PRODUCT_IMAGES_URL) + 1:]
+        if (
+            image.startswith(PRODUCT_IMAGES_URL + "/") and stored_name == os.path.basename(stored_name)
+            and os.path.isfile(image_disk_path(image))
+        ):
+            return image
+        where = "in zip" if self.images is not None else "(no images zip uploaded)"
+        raise HTTPException(status_code=400, detail=f"Image {image} not found {where}")
+
+    def _after_commit(self, product_ids: list[int], values: list[dict]):
+        catalog_cache.invalidate(*product_tags(*{value["category_id"] for value in values}))
+        for product_id, value in zip(product_ids, values):
+            product = Product(id=product_id, **value)
+            search_backend.index_product(product)
+            suggest_index.add_product(product_id, value["name"])
+        for image_path in {value["image_path"] for value in values} - {PLACEHOLDER_IMAGE_URL}:
+            schedule_derivatives(image_path)
+
+    def _progress(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "rows_per_second": round(self.processed / elapsed) if elapsed else None,
+        }
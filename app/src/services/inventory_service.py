@@ -0,0 +1,185 @@
+import json
+import time
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, text, update
+from sqlalchemy.orm import Session
+
+from app.src.core.config import INVENTORY_BULK_CHUNK
+from app.src.models.inventory import Inventory
+from app.src.schemas.inventory import InventoryBulkEntry
+from app.src.services.stock_counters import stock_counters
+
+
+def iter_entries(items: Iterable) -> Iterator[tuple[int, dict | None, str | None]]:
+    # (row number, raw entry, error) for the elements of a JSON list
+    for row_number, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            yield row_number, None, "Entry must be a JSON object"
+            continue
+        yield row_number, item, None
+
+
+def iter_ndjson_entries(lines: Iterable[bytes]) -> Iterator[tuple[int, dict | None, str | None]]:
+    for row_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as exp:
+            yield row_number, None, f"Invalid JSON: {exp}"
+            continue
+        if not isinstance(item, dict):
+            yield row_number, None, "Entry must be a JSON object"
+            continue
+        yield row_number, item, None
+
+
+@lru_cache(maxsize=16)
+def _bulk_update_statement(size: int):
+    # built once per chunk size, so the SQL text is parsed and compiled once, not per chunk
+    rows = ", ".join(f"(:p{index}, :m{index}, :q{index})" for index in range(size))
+    new_stock = "CASE WHEN v.column2 = 1 THEN v.column3 ELSE inventory.stock_quantity + v.column3 END"
+    return text(
+        f"UPDATE inventory SET stock_quantity = {new_stock} "
+        f"FROM (VALUES {rows}) AS v "
+        f"WHERE inventory.product_id = v.column1 AND {new_stock} >= 0 "
+        "RETURNING inventory.product_id, inventory.stock_quantity, inventory.sharded"
+    )
+
+
+class InventoryBulkUpdater:
+    """
+    Applies {product_id, stock_quantity | delta} entries INVENTORY_BULK_CHUNK at a
+    time, each chunk as one set-based statement and one commit:
+
+        UPDATE inventory SET stock_quantity = <set or add>
+        FROM (VALUES ...) AS v WHERE inventory.product_id = v.column1
+        AND <new stock> >= 0 RETURNING ...
+
+    Rows that would go negative are left out by the WHERE clause, so the
+    stock_quantity_non_negative constraint never aborts a chunk. A product appears at
+    most once per chunk: an entry repeating one closes the chunk early, so every entry
+    is applied on top of the previous ones and gets its own outcome. `run` yields one
+    outcome per entry, in input order, and a final summary.
+
+    Sharded products are drained right before their chunk's UPDATE: the stock left
+    in their counters is written to the row in the same transaction, the entry is
+    applied on top of it, and the result is put back into the counters after the
+    commit. Sales made while the bulk update runs are therefore never overwritten.
+    """
+
+    def __init__(self, db: Session, chunk_size: int = INVENTORY_BULK_CHUNK):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.processed = 0
+        self.updated = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def run(self, entries: Iterator[tuple[int, dict | None, str | None]]) -> Iterator[dict]:
+        chunk: list[tuple[int, InventoryBulkEntry]] = []
+        chunk_products: set[int] = set()
+        for row_number, data, error in entries:
+            self.processed += 1
+            if error is None:
+                try:
+                    entry = InventoryBulkEntry.model_validate(data)
+                except ValidationError as exp:
+                    error = "; ".join(e["msg"] for e in exp.errors())
+            if error:
+                yield self._reject(row_number, None, error)
+                continue
+
+            if entry.product_id in chunk_products:
+                yield from self._apply(chunk)
+                chunk, chunk_products = [], set()
+
+            chunk.append((row_number, entry))
+            chunk_products.add(entry.product_id)
+            if len(chunk) >= self.chunk_size:
+                yield from self._apply(chunk)
+                chunk, chunk_products = [], set()
+
+        if chunk:
+            yield from self._apply(chunk)
+
+        elapsed = time.perf_counter() - self.started
+        yield {
+            "type": "summary",
+            "processed": self.processed,
+            "updated": self.updated,
+            "failed": self.failed,
+            "rows_per_second": round(self.processed / elapsed) if elapsed else None,
+        }
+
+    def _reject(self, row_number: int, product_id: int | None, error: str) -> dict:
+        self.failed += 1
+        return {"type": "error", "row": row_number, "product_id": product_id, "error": error}
+
+    def _apply(self, chunk: list[tuple[int, InventoryBulkEntry]]) -> Iterator[dict]:
+        # product_id -> (1, new stock) for a set, (0, delta) for a delta
+        changes = {
+            entry.product_id: (1, entry.stock_quantity) if entry.stock_quantity is not None else (0, entry.delta)
+            for _, entry in chunk
+        }
+
+        params = {}
+        for index, (product_id, (mode, amount)) in enumerate(changes.items()):
+            params.update({f"p{index}": product_id, f"m{index}": mode, f"q{index}": amount})
+        statement = _bulk_update_statement(len(changes))
+
+        # sharded products start from what their counters hold now, not the last reconcile
+        drained = {product_id: stock_counters.drain(product_id) for product_id in stock_counters.sharded_ids(changes)}
+        try:
+            if drained:
+                inventory = Inventory.__table__
+                self.db.execute(
+                    update(inventory)
+                    .where(inventory.c.product_id == bindparam("pid"), inventory.c.sharded.is_(True))
+                    .values(stock_quantity=bindparam("quantity")),
+                    [{"pid": product_id, "quantity": quantity} for product_id, quantity in drained.items()]
+                )
+            updated = {product_id: (stock, sharded) for product_id, stock, sharded in self.db.execute(statement, params)}
+            skipped = [product_id for product_id in changes if product_id not in updated]
+            existing = set()
+            if skipped:
+                existing = {
+                    product_id for (product_id,) in
+                    self.db.query(Inventory.product_id).filter(Inventory.product_id.in_(skipped))
+                }
+            self.db.commit()
+        except Exception as exp:
+            self.db.rollback()
+            for product_id, quantity in drained.items():
+                stock_counters.refill(product_id, quantity)
+            for row_number, entry in chunk:
+                yield self._reject(row_number, entry.product_id, f"Chunk failed: {exp.__class__.__name__}")
+            return
+
+        for product_id, quantity in drained.items():
+            if product_id not in updated:
+                stock_counters.refill(product_id, quantity)
+        for product_id, (stock, sharded) in updated.items():
+            if product_id in drained:
+                if sharded:
+                    stock_counters.refill(product_id, stock)
+                else:
+                    stock_counters.unshard(product_id)
+            elif sharded:
+                stock_counters.distribute(product_id, stock)
+
+        for row_number, entry in chunk:
+            if entry.product_id in updated:
+                self.updated += 1
+                yield {
+                    "type": "updated", "row": row_number, "product_id": entry.product_id,
+                    "stock_quantity": updated[entry.product_id][0]
+                }
+            elif entry.product_id in existing:
+                yield self._reject(row_number, entry.product_id, "Stock cannot go negative")
+            else:
+                yield self._reject(row_number, entry.product_id, "Inventory record not found")
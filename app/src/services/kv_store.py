@@ -0,0 +1,119 @@
+import threading
+import time
+
+
+class LocalKeyValueStore:
+    """
+    In-process stand-in for the subset of the Redis API the key-value backed stores
+    use (hashes, sets, counters, expiry), so they run without a Redis server.
+    Data lives only as long as the process and is not shared between workers.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._hashes: dict[str, dict[str, str]] = {}
+        self._sets: dict[str, set] = {}
+        self._values: dict[str, int] = {}
+        self._expires: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def hgetall(self, key: str) -> dict:
+        with self._lock:
+            self._check_expiry(key)
+            return dict(self._hashes.get(key, {}))
+
+    def hset(self, key: str, mapping: dict):
+        with self._lock:
+            self._check_expiry(key)
+            self._hashes.setdefault(key, {}).update({field: str(value) for field, value in mapping.items()})
+
+    def hsetnx(self, key: str, field: str, value) -> bool:
+        with self._lock:
+            self._check_expiry(key)
+            values = self._hashes.setdefault(key, {})
+            if field in values:
+                return False
+            values[field] = str(value)
+            return True
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        with self._lock:
+            self._check_expiry(key)
+            values = self._hashes.setdefault(key, {})
+            values[field] = str(int(values.get(field, 0)) + amount)
+            return int(values[field])
+
+    def hdel(self, key: str, *fields: str):
+        with self._lock:
+            values = self._hashes.get(key, {})
+            for field in fields:
+                values.pop(field, None)
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            value = self._values.get(key)
+            return None if value is None else str(value)
+
+    def mget(self, keys: list[str]) -> list:
+        with self._lock:
+            return [None if key not in self._values else str(self._values[key]) for key in keys]
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._values[key] = int(value)
+
+    def incrby(self, key: str, amount: int) -> int:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            return self._values[key]
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._hashes.pop(key, None)
+                self._sets.pop(key, None)
+                self._values.pop(key, None)
+                self._expires.pop(key, None)
+
+    def expire(self, key: str, seconds: int):
+        with self._lock:
+            self._expires[key] = time.monotonic() + seconds
+
+    def sadd(self, key: str, *members):
+        with self._lock:
+            self._sets.setdefault(key, set()).update(str(member) for member in members)
+
+    def srem(self, key: str, *members):
+        with self._lock:
+            self._sets.get(key, set()).difference_update(str(member) for member in members)
+
+    def smembers(self, key: str) -> set:
+        with self._lock:
+            return set(self._sets.get(key, set()))
+
+    def spop(self, key: str, count: int) -> list:
+        with self._lock:
+            members = self._sets.get(key, set())
+            return [members.pop() for _ in range(min(count, len(members)))]
+
+    def _check_expiry(self, key: str):
+        expires = self._expires.get(key)
+        if expires is not None and expires < time.monotonic():
+            self._hashes.pop(key, None)
+            self._expires.pop(key, None)
+
+
+def is_shared(kv) -> bool:
+    # whether every worker process sees the same data (a Redis client does)
+    return getattr(kv, "shared", True)
+
+
+def connect_kv(url: str):
+    # "memory" or a redis:// url; anything else means "no key-value store"
+    if url == "memory":
+        return LocalKeyValueStore()
+    if url.startswith(("redis://", "rediss://")):
+        import redis  # optional dependency, only needed for Redis-backed stores
+        return redis.Redis.from_url(url, decode_responses=True)
+    return None
@@ -0,0 +1,68 @@
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.src.core.config import ORDER_PUSH_INTERVAL
+from app.src.db.database import SessionLocal
+from app.src.models.orders import Order
+from app.src.security.manager import Manager
+from app.src.utils.periodic import PeriodicTask
+
+# processed orders are re-read this far back, so one stamped by a worker whose clock lags
+# or committed after the previous poll already looked at its timestamp is not skipped
+PUSH_OVERLAP = timedelta(seconds=30)
+
+
+class OrderStatusPusher:
+    """
+    Pushes {"type": "order", "order_id", "status"} to the buyer's /orders/ws socket
+    once their async order is processed.
+
+    The worker that processes an order is often not the process holding the socket
+    (DatabaseOrderQueue workers run everywhere, the POST may land on another
+    worker), so the outcome travels through the orders table: process_order stamps
+    processed_at and every process polls for orders processed since its last look
+    whose user is connected to it. Orders already pushed within PUSH_OVERLAP are
+    remembered so the re-read window sends each outcome once.
+    """
+
+    def __init__(self):
+        self.since = datetime.utcnow()
+        self._sent: dict[int, datetime] = {}   # order id -> processed_at
+
+    def poll(self, db: Session) -> int:
+        now = datetime.utcnow()
+        user_ids = list(Manager.active_connections)
+        pushed = 0
+        if user_ids:
+            rows = (
+                db.query(Order.id, Order.user_id, Order.status, Order.processed_at)
+                .filter(Order.processed_at > self.since - PUSH_OVERLAP, Order.user_id.in_(user_ids))
+                .all()
+            )
+            for order_id, user_id, order_status, processed_at in rows:
+                if order_id in self._sent:
+                    continue
+                self._sent[order_id] = processed_at
+                Manager.send_threadsafe(user_id, json.dumps({"type": "order", "order_id": order_id, "status": order_status}))
+                pushed += 1
+
+        self.since = now
+        cutoff = now - PUSH_OVERLAP
+        self._sent = {order_id: processed_at for order_id, processed_at in self._sent.items() if processed_at > cutoff}
+        return pushed
+
+
+order_status_pusher = OrderStatusPusher()
+
+
+def _push():
+    db = SessionLocal()
+    try:
+        order_status_pusher.poll(db)
+    finally:
+        db.close()
+
+
+order_status_poller = PeriodicTask("order-status-pusher", ORDER_PUSH_INTERVAL, _push)
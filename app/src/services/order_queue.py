@@ -0,0 +1,129 @@
+import logging
+import queue
+import threading
+
+from app.src.core.config import ORDER_QUEUE, ORDER_WORKERS, ORDER_QUEUE_POLL_INTERVAL
+from app.src.db.database import SessionLocal
+from app.src.models.orders import Order
+from app.src.services.order_service import process_order
+
+logger = logging.getLogger(__name__)
+
+
+def _run_job(order_id: int):
+    db = SessionLocal()
+    try:
+        process_order(db, order_id)
+    except Exception:
+        logger.exception("Order job %s failed", order_id)
+    finally:
+        db.close()
+
+
+def _queued_order_ids(limit: int | None = None) -> list[int]:
+    db = SessionLocal()
+    try:
+        query = db.query(Order.id).filter(Order.status == "queued").order_by(Order.id)
+        if limit:
+            query = query.limit(limit)
+        return [order_id for (order_id,) in query]
+    finally:
+        db.close()
+
+
+class InProcessOrderQueue:
+    """
+    Order jobs on a queue.Queue drained by a pool of worker threads. Jobs live only
+    in this process, so orders still "queued" in the database are re-submitted on
+    start; process_order's claim makes a duplicate submission harmless.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._jobs: queue.Queue = queue.Queue()
+        self._threads: list[threading.Thread] = []
+
+    def submit(self, order_id: int):
+        self._jobs.put(order_id)
+
+    def start(self):
+        if self._threads:
+            return
+        for order_id in _queued_order_ids():
+            self._jobs.put(order_id)
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"order-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self):
+        while True:
+            order_id = self._jobs.get()
+            try:
+                if order_id is None:
+                    return
+                _run_job(order_id)
+            finally:
+                self._jobs.task_done()
+
+
+class DatabaseOrderQueue:
+    """
+    The orders table is the queue: workers in every process poll for "queued" rows
+    (through the partial ix_orders_queued index) and claim each one with
+    FOR UPDATE SKIP LOCKED, so they never block on or double-process a row.
+    Submitting from this process wakes the local workers instead of waiting a poll.
+    """
+
+    def __init__(self, workers: int, poll_interval: float):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def submit(self, order_id: int):
+        self._wakeup.set()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"order-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            order_ids = _queued_order_ids(limit=self.workers * 4)
+            for order_id in order_ids:
+                if self._stop.is_set():
+                    return
+                _run_job(order_id)
+            if not order_ids:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+
+def get_order_queue():
+    if ORDER_QUEUE == "database":
+        return DatabaseOrderQueue(ORDER_WORKERS, ORDER_QUEUE_POLL_INTERVAL)
+    return InProcessOrderQueue(ORDER_WORKERS)
+
+
+order_queue = get_order_queue()
@@ -0,0 +1,156 @@
+import logging
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, update, tuple_
+from sqlalchemy.orm import Query, Session, selectinload
+
+from app.src.models.orders import Order, OrderItem
+from app.src.services.cart_store import cart_store
+from app.src.services.stock_service import reserve_stock
+from app.src.services.suggest_service import suggest_index
+from app.src.utils.pagination import encode_cursor, decode_cursor
+
+logger = logging.getLogger(__name__)
+
+
+def load_order(db: Session, order_id: int) -> Order | None:
+    # order + items + products for OrderOut in two queries
+    return (
+        db.query(Order)
+        .options(selectinload(Order.items).joinedload(OrderItem.product))
+        .filter(Order.id == order_id)
+        .first()
+    )
+
+
+def paginate_orders(query: Query, limit: int, cursor: str | None) -> tuple[list[Order], str | None]:
+    # keyset page over (created_at, id), newest first: page 1000 costs the same as page 1
+    if cursor:
+        values = decode_cursor(cursor, "orders")
+        try:
+            created_at, order_id = datetime.fromisoformat(values[0]), int(values[1])
+        except (ValueError, TypeError, IndexError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        query = query.filter(tuple_(Order.created_at, Order.id) < (created_at, order_id))
+
+    orders = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor("orders", [orders[-1].created_at.isoformat(), orders[-1].id])
+    return orders, next_cursor
+
+
+def _cart_lines(db: Session, user_id: int) -> list[dict]:
+    cart = cart_store.read(db, user_id)
+    if not cart['items']:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cart is empty"
+        )
+    return [
+        {"product_id": item.product_id, "quantity": item.quantity, "price": item.product.price}
+        for item in cart['items']
+    ]
+
+
+def _total(lines: list[dict]) -> float:
+    return sum(line["quantity"] * line["price"] for line in lines)
+
+
+def _fill_order(db: Session, order_id: int, user_id: int, lines: list[dict]):
+    # items (one multi-row INSERT), stock reservation and cart clear, in the caller's transaction
+    db.execute(insert(OrderItem), [{"order_id": order_id, **line} for line in lines])
+    reserve_stock(db, order_id, lines)
+    cart_store.clear(db, user_id)
+
+
+def _record_sales(lines: list[dict]):
+    for line in lines:
+        suggest_index.record_sale(line["product_id"], line["quantity"])
+
+
+def create_order(db: Session, user_id: int) -> Order:
+    """
+    Turns the user's cart into an order as one unit of work: the cart is read with
+    its products, the order row and all of its items are inserted (one multi-row
+    INSERT for the items), stock is reserved, the cart is cleared and everything
+    commits once. Nothing is written if any step fails.
+    """
+    lines = _cart_lines(db, user_id)
+
+    try:
+        order = Order(user_id=user_id, total_price=_total(lines), status="pending")
+        db.add(order)
+        db.flush()
+
+        _fill_order(db, order.id, user_id, lines)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    _record_sales(lines)
+    return load_order(db, order.id)
+
+
+def enqueue_order(db: Session, user_id: int) -> Order:
+    # async checkout: only the cart check and a "queued" order row happen in the request
+    lines = _cart_lines(db, user_id)
+    order = Order(user_id=user_id, total_price=_total(lines), status="queued")
+    db.add(order)
+    db.commit()
+    return order
+
+
+def process_order(db: Session, order_id: int) -> str | None:
+    """
+    Runs checkout for a queued order in a worker. The order row is claimed with
+    FOR UPDATE SKIP LOCKED, so concurrent workers never process it twice; the cart
+    is read at this point and the order becomes "pending" (or "failed" with a
+    reason) in a single commit, stamped with processed_at for the status push.
+    Returns the new status, or None if the order was not (or no longer) queued.
+    """
+    row = (
+        db.query(Order.user_id)
+        .filter(Order.id == order_id, Order.status == "queued")
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not row:
+        db.rollback()
+        return None
+    user_id = row.user_id
+
+    try:
+        lines = _cart_lines(db, user_id)
+        claimed = db.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status == "queued")
+            .values(status="pending", total_price=_total(lines), processed_at=datetime.utcnow())
+        ).rowcount
+        if not claimed:
+            db.rollback()
+            return None
+        _fill_order(db, order_id, user_id, lines)
+        db.commit()
+    except Exception as exp:
+        db.rollback()
+        if isinstance(exp, HTTPException):
+            reason = str(exp.detail)
+        else:
+            logger.exception("Order %s failed", order_id)
+            reason = "Order could not be processed"
+        db.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status == "queued")
+            .values(status="failed", failure_reason=reason, processed_at=datetime.utcnow())
+        )
+        db.commit()
+        order_status = "failed"
+    else:
+        _record_sales(lines)
+        order_status = "pending"
+    return order_status
@@ -0,0 +1,241 @@
+import logging
+import random
+import secrets
+import threading
+import time
+
+import requests
+from fastapi import HTTPException, status
+from requests.adapters import HTTPAdapter
+
+from app.src.core.config import (
+    STRIPE_SECRET_KEY, PAYMENT_PROVIDER, PAYMENT_API_BASE, PAYMENT_POOL_SIZE, PAYMENT_TIMEOUT, PAYMENT_RETRIES,
+    PAYMENT_BACKOFF, PAYMENT_BREAKER_THRESHOLD, PAYMENT_BREAKER_RESET, PAYMENT_FAKE_LATENCY, PAYMENT_FAKE_FAILURE_RATE
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderError(Exception):
+    """A failed provider call; `retryable` for timeouts, connection errors, 429 and 5xx."""
+
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class StripeProvider:
+    """
+    Stripe's REST API over one pooled requests.Session: up to `pool_size` kept-alive
+    connections are reused across calls instead of a TLS handshake per payment.
+    """
+
+    def __init__(self, api_key: str, base_url: str, pool_size: int):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.session.auth = (api_key, "")
+        # retries are the client's job (deadline-aware), not urllib3's
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def create_intent(self, amount: int, currency: str, metadata: dict, idempotency_key: str, timeout: float) -> dict:
+        data = {"amount": amount, "currency": currency}
+        data.update({f"metadata[{name}]": value for name, value in metadata.items()})
+        try:
+            response = self.session.post(
+                f"{self.base_url}/v1/payment_intents", data=data,
+                headers={"Idempotency-Key": idempotency_key}, timeout=timeout
+            )
+        except requests.RequestException as exp:
+            raise ProviderError(f"{exp.__class__.__name__}: {exp}", retryable=True)
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ProviderError(f"Provider returned {response.status_code}", retryable=True)
+        try:
+            body = response.json()
+        except ValueError:
+            raise ProviderError(f"Provider returned a non-JSON {response.status_code} response", retryable=False)
+        if response.status_code >= 400:
+            raise ProviderError(body.get("error", {}).get("message", "Payment provider rejected the request"), retryable=False)
+        return {"id": body["id"], "client_secret": body["client_secret"], "status": body["status"]}
+
+    def close(self):
+        self.session.close()
+
+
+class FakeProvider:
+    """
+    In-process stand-in with the provider's contract: idempotency keys return the
+    same intent, and `latency` / `failure_rate` simulate a slow or flaky provider so
+    the payment path can be load-tested offline.
+    """
+
+    def __init__(self, latency: float = 0, failure_rate: float = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.intents: dict[str, dict] = {}
+        self._by_key: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def create_intent(self, amount: int, currency: str, metadata: dict, idempotency_key: str, timeout: float) -> dict:
+        if self.latency:
+            time.sleep(min(self.latency, timeout))
+            if self.latency > timeout:
+                raise ProviderError("ReadTimeout: fake provider", retryable=True)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ProviderError("Provider returned 503", retryable=True)
+
+        with self._lock:
+            intent_id = self._by_key.get(idempotency_key)
+            if intent_id is None:
+                intent_id = f"pi_fake_{secrets.token_hex(12)}"
+                self.intents[intent_id] = {
+                    "id": intent_id, "client_secret": f"{intent_id}_secret_{secrets.token_hex(12)}",
+                    "status": "requires_payment_method", "amount": amount, "currency": currency, "metadata": metadata,
+                }
+                self._by_key[idempotency_key] = intent_id
+            intent = self.intents[intent_id]
+        return {"id": intent["id"], "client_secret": intent["client_secret"], "status": intent["status"]}
+
+    def close(self):
+        pass
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed calls and fails calls fast for
+    `reset_timeout` seconds; then a single trial call decides whether it closes
+    again (success) or stays open for another period (failure).
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning("Payment provider circuit opened after %s failures", self.failures)
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+class PaymentGateway:
+    """
+    The one way the app talks to the payment provider. Every call has a deadline
+    (PAYMENT_TIMEOUT for all attempts together), so a slow provider holds a worker
+    thread for a bounded time. Retryable failures are retried up to `retries` times
+    with full-jitter exponential backoff, and all attempts share one provider
+    idempotency key, so a retry never creates a second intent. A circuit breaker
+    turns a degraded provider into an immediate 503 instead of a pile of waiting
+    requests.
+    """
+
+    def __init__(self, provider, timeout: float, retries: int, backoff: float, breaker: CircuitBreaker):
+        self.provider = provider
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker
+
+    def create_intent(self, amount: int, currency: str, metadata: dict, idempotency_key: str) -> dict:
+        if not self.breaker.allow():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Payment provider is unavailable, try again later"
+            )
+
+        # one verdict per call, however it ends: a half-open breaker's trial is
+        # always settled, and retries don't count as separate failures
+        healthy = False
+        try:
+            intent = self._call_with_retries(amount, currency, metadata, idempotency_key)
+            healthy = True
+            return intent
+        except ProviderError as exp:
+            # the provider answered: a rejected request says nothing about its health
+            healthy = True
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exp))
+        except HTTPException:
+            raise
+        except Exception:
+            logger.exception("Unexpected payment provider response")
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Unexpected response from payment provider")
+        finally:
+            if healthy:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+
+    def _call_with_retries(self, amount: int, currency: str, metadata: dict, idempotency_key: str) -> dict:
+        # raises non-retryable ProviderErrors as they are, 504 once retries or the deadline run out
+        deadline = time.monotonic() + self.timeout
+        attempt = 0
+        while True:
+            try:
+                return self.provider.create_intent(
+                    amount, currency, metadata, idempotency_key, timeout=max(deadline - time.monotonic(), 0.001)
+                )
+            except ProviderError as exp:
+                if not exp.retryable:
+                    raise
+                logger.warning("Payment provider call failed (attempt %s): %s", attempt + 1, exp)
+
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            attempt += 1
+            if attempt > self.retries or time.monotonic() + delay >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                    detail="Payment provider did not respond in time"
+                )
+            time.sleep(delay)
+
+    def close(self):
+        self.provider.close()
+
+
+def get_payment_gateway() -> PaymentGateway:
+    if PAYMENT_PROVIDER == "fake":
+        provider = FakeProvider(PAYMENT_FAKE_LATENCY, PAYMENT_FAKE_FAILURE_RATE)
+    elif PAYMENT_PROVIDER == "stripe":
+        if not STRIPE_SECRET_KEY:
+            raise ValueError("PAYMENT_PROVIDER=stripe requires STRIPE_SECRET_KEY")
+        provider = StripeProvider(STRIPE_SECRET_KEY, PAYMENT_API_BASE, PAYMENT_POOL_SIZE)
+    else:
+        raise ValueError("PAYMENT_PROVIDER must be 'stripe' or 'fake'")
+    return PaymentGateway(
+        provider, PAYMENT_TIMEOUT, PAYMENT_RETRIES, PAYMENT_BACKOFF,
+        CircuitBreaker(PAYMENT_BREAKER_THRESHOLD, PAYMENT_BREAKER_RESET)
+    )
+
+
+payment_gateway = get_payment_gateway()
@@ -1,34 +1,46 @@
-from fastapi import FastAPI, status, HTTPException
+from fastapi import status, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.src.models.orders import Order
 from app.src.models.payments import Payment
-import stripe
+from app.src.services.payment_gateway import payment_gateway
+
+def create_payment_intent(db: Session, order_id: int, user_id: int, currency: str = "usd") -> tuple[Payment, str]:
+    # only the order's owner gets a client_secret for it
+    order = db.query(Order).filter(Order.id == order_id, Order.user_id == user_id).first()
 
-def create_payment_intent(db: Session, order_id: int):
-    order = db.query(Order).filter(Order.id == order_id).first()
-    
     if not order:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Order not found")
-    
-    if Order.status != 'pending':
+
+    if order.status != 'pending':
         raise HTTPException(status_code=400, detail="Order already paid or canceled")
-    
-    intent = stripe.PaymentIntent.create(
-        order_id = order.id,
-        amount = int(order.total_price * 100), # int is used to remove the decimal 
-        currency = "usd",
-        metadata = {"order_id": order.id}
+
+    if db.query(Payment.id).filter(Payment.order_id == order.id).first():
+        raise HTTPException(status_code=400, detail="Order already paid")
+
+    # the provider key is per order, so a retried or concurrent request gets the same intent back
+    intent = payment_gateway.create_intent(
+        amount=int(round(order.total_price * 100)), # provider amounts are in cents
+        currency=currency,
+        metadata={"order_id": order.id},
+        idempotency_key=f"order-{order.id}-intent"
     )
-    
+
     payment = Payment(
         order_id = order.id,
         amount = order.total_price,
-        currency = "usd",
-        status = 'pending'
+        currency = currency,
+        status = 'pending',
+        provider_intent_id = intent["id"]
     )
-    
+
     db.add(payment)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # a concurrent request for the same order stored the intent first
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Order already paid")
     db.refresh(payment)
-    
-    return intent.client_secret
\ No newline at end of file
+
+    return payment, intent["client_secret"]
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.src.models.products import Product
+from app.src.services.version_service import get_version
+
+# changes are re-read this far back, so rows stamped by a worker whose clock lags or
+# committed after a pass already looked at their timestamp are not skipped
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class ProductSync:
+    """
+    Change feed over the products table for in-memory indexes kept by every worker.
+
+    `begin` marks the point a full build started from. `changes` then returns only
+    the rows whose updated_at is newer than the previous pass (minus SYNC_OVERLAP),
+    plus the ids of deleted products, and nothing at all while the products version
+    marker hasn't moved. Applying a row twice must be harmless for the index.
+    """
+
+    def __init__(self):
+        self.version: int | None = None
+        self.since: datetime | None = None
+
+    def begin(self, db: Session):
+        # read before the build scans the table: a write landing during it is re-read later
+        self.version, _ = get_version(db, "products")
+        self.since = datetime.utcnow()
+
+    def changes(self, db: Session, columns: list, indexed_ids) -> tuple[list, set[int]] | None:
+        # (changed rows, deleted ids), or None if nothing changed since the last pass
+        version, _ = get_version(db, "products")
+        if self.since is None or version == self.version:
+            return None
+        since = datetime.utcnow()
+        rows = db.query(Product.id, *columns).filter(Product.updated_at > self.since - SYNC_OVERLAP).all()
+
+        # once the changed rows are applied the index holds every live id, so any
+        # surplus is deletions; only then are the ids compared
+        known = set(indexed_ids) | {row.id for row in rows}
+        deleted = set()
+        if db.query(func.count(Product.id)).scalar() < len(known):
+            deleted = known - {product_id for (product_id,) in db.query(Product.id)}
+
+        self.version, self.since = version, since
+        return rows, deleted
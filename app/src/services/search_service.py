@@ -0,0 +1,205 @@
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+
+from sqlalchemy import Float, Numeric, func, literal_column, tuple_
+from sqlalchemy.orm import Session
+
+from app.src.core.config import SEARCH_BACKEND, SEARCH_REFRESH_INTERVAL
+from app.src.db.database import engine, SessionLocal
+from app.src.models.products import Product, PRODUCT_SEARCH_VECTOR_SQL
+from app.src.services.product_sync import ProductSync
+from app.src.utils.periodic import PeriodicTask
+
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "is", "it", "of", "on", "or", "the", "to", "with",
+}
+
+# name matches count more than description matches (same idea as setweight 'A'/'B')
+NAME_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return [token for token in re.findall(r"\w+", text.lower()) if token not in STOP_WORDS]
+
+
+class InvertedIndexBackend:
+    """
+    Pure-Python BM25 inverted index over Product.name and Product.description.
+
+    Used for SQLite/test runs. Queries intersect postings starting from the rarest
+    term, so work is bounded by the most selective term rather than catalog size.
+
+    Writes in this process update the index directly; `refresh` re-indexes the
+    products other workers changed or deleted since its previous pass.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)  # term -> {product_id: weighted tf}
+        self._docs: dict[int, tuple[int, float, tuple]] = {}              # product_id -> (category_id, length, terms)
+        self._total_length = 0.0
+        self._lock = threading.Lock()
+        self.sync = ProductSync()
+
+    def rebuild(self, db: Session):
+        self.sync.begin(db)
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._total_length = 0.0
+
+        rows = (
+            db.query(Product.id, Product.name, Product.description, Product.category_id)
+            .execution_options(yield_per=1000)
+        )
+        for row in rows:
+            self._add(row.id, row.name, row.description, row.category_id)
+
+    def refresh(self, db: Session) -> bool:
+        with self._lock:
+            indexed_ids = list(self._docs)
+        changes = self.sync.changes(db, [Product.name, Product.description, Product.category_id], indexed_ids)
+        if changes is None:
+            return False
+        rows, deleted = changes
+        for row in rows:
+            self.remove_product(row.id)
+            self._add(row.id, row.name, row.description, row.category_id)
+        for product_id in deleted:
+            self.remove_product(product_id)
+        return True
+
+    def index_product(self, product: Product):
+        self.remove_product(product.id)
+        self._add(product.id, product.name, product.description, product.category_id)
+
+    def remove_product(self, product_id: int):
+        with self._lock:
+            doc = self._docs.pop(product_id, None)
+            if not doc:
+                return
+            _, length, terms = doc
+            self._total_length -= length
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(product_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+    def search(self, db: Session, q: str, category_id: int | None, limit: int, after: tuple | None) -> list[tuple[float, int]]:
+        terms = list(dict.fromkeys(tokenize(q)))
+        if not terms:
+            return []
+
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+            if not all(postings):
+                return []
+
+            doc_count = len(self._docs)
+            avg_length = self._total_length / doc_count if doc_count else 1.0
+
+            # all terms must match; walk the shortest postings list and probe the rest
+            postings.sort(key=len)
+            candidates = []
+            for product_id in postings[0]:
+                doc = self._docs[product_id]
+                if category_id is not None and doc[0] != category_id:
+                    continue
+                if not all(product_id in other for other in postings[1:]):
+                    continue
+
+                score = 0.0
+                for term_postings in postings:
+                    tf = term_postings[product_id]
+                    idf = math.log(1 + (doc_count - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                    norm = tf + self.k1 * (1 - self.b + self.b * doc[1] / avg_length)
+                    score += idf * tf * (self.k1 + 1) / norm
+                score = round(score, 6)
+
+                # results are ordered by (score, id) descending; skip everything up to the cursor
+                if after is not None and (score, product_id) >= after:
+                    continue
+                candidates.append((score, product_id))
+
+        return heapq.nlargest(limit, candidates)
+
+    def _add(self, product_id: int, name: str | None, description: str | None, category_id: int):
+        weights: dict[str, float] = defaultdict(float)
+        for token in tokenize(name):
+            weights[token] += NAME_WEIGHT
+        for token in tokenize(description):
+            weights[token] += DESCRIPTION_WEIGHT
+
+        length = sum(weights.values())
+        with self._lock:
+            for term, weight in weights.items():
+                self._postings[term][product_id] = weight
+            self._docs[product_id] = (category_id, length, tuple(weights))
+            self._total_length += length
+
+
+class PostgresSearchBackend:
+    """
+    Postgres full-text search over the GIN expression index on products.
+
+    The tsvector is an index expression, so Postgres maintains it on every write and
+    the add/update/delete hooks have nothing to do.
+    """
+
+    search_vector = literal_column(f"({PRODUCT_SEARCH_VECTOR_SQL})")
+
+    def rebuild(self, db: Session):
+        pass
+
+    def refresh(self, db: Session) -> bool:
+        return False
+
+    def index_product(self, product: Product):
+        pass
+
+    def remove_product(self, product_id: int):
+        pass
+
+    def search(self, db: Session, q: str, category_id: int | None, limit: int, after: tuple | None) -> list[tuple[float, int]]:
+        ts_query = func.websearch_to_tsquery(literal_column("'english'"), q)
+        rank = func.round(func.ts_rank_cd(self.search_vector, ts_query).cast(Numeric), 6).cast(Float)
+
+        query = db.query(rank.label("score"), Product.id).filter(self.search_vector.op("@@")(ts_query))
+        if category_id is not None:
+            query = query.filter(Product.category_id == category_id)
+        if after is not None:
+            query = query.filter(tuple_(rank, Product.id) < after)
+
+        rows = query.order_by(rank.desc(), Product.id.desc()).limit(limit).all()
+        return [(row.score, row.id) for row in rows]
+
+
+def get_search_backend():
+    backend = SEARCH_BACKEND or engine.dialect.name
+    if backend in ("postgres", "postgresql"):
+        return PostgresSearchBackend()
+    return InvertedIndexBackend()
+
+
+def _refresh():
+    db = SessionLocal()
+    try:
+        search_backend.refresh(db)
+    finally:
+        db.close()
+
+
+search_backend = get_search_backend()
+search_refresher = PeriodicTask("search-refresher", SEARCH_REFRESH_INTERVAL, _refresh)
@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.src.core.config import LOW_STOCK_THRESHOLD, STOCK_ALERT_INTERVAL, STOCK_ALERT_FLUSH_INTERVAL
+from app.src.db.database import SessionLocal
+from app.src.models.notification import Notification
+from app.src.models.products import Product
+from app.src.models.user import User
+from app.src.security.manager import AdminManager
+from app.src.utils.periodic import PeriodicTask
+
+
+def is_low(stock_quantity: int, threshold: int | None) -> bool:
+    return stock_quantity <= (LOW_STOCK_THRESHOLD if threshold is None else threshold)
+
+
+class StockAlerts:
+    """
+    Low-stock / restocked events for products whose stock crosses their threshold.
+
+    Writers only `record` the crossing in memory. The flusher coalesces everything
+    recorded for a product since its last alert into its latest state (a product
+    that dips and recovers in between sends nothing), sends at most one alert per
+    product every STOCK_ALERT_INTERVAL seconds, pushes the batch to connected
+    admins and stores it as Notification rows for every admin in one INSERT.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        # product_id -> (was low before the first unsent change, stock, threshold)
+        self._pending: dict[int, tuple[bool, int, int | None]] = {}
+        self._last_sent: dict[int, float] = {}
+
+    def record(self, product_id: int, was_low: bool, stock_quantity: int, threshold: int | None):
+        if was_low == is_low(stock_quantity, threshold) and product_id not in self._pending:
+            return
+        with self._lock:
+            baseline = self._pending.get(product_id, (was_low,))[0]
+            self._pending[product_id] = (baseline, stock_quantity, threshold)
+
+    def due(self) -> list[dict]:
+        # alerts whose product is out of its rate-limit window; the rest stay pending
+        now = time.monotonic()
+        alerts = []
+        with self._lock:
+            for product_id, (was_low, stock_quantity, threshold) in list(self._pending.items()):
+                if now - self._last_sent.get(product_id, -self.interval) < self.interval:
+                    continue
+                del self._pending[product_id]
+                low = is_low(stock_quantity, threshold)
+                if low == was_low:
+                    continue
+                self._last_sent[product_id] = now
+                alerts.append({
+                    "type": "low_stock" if low else "restocked",
+                    "product_id": product_id,
+                    "stock_quantity": stock_quantity,
+                    "threshold": LOW_STOCK_THRESHOLD if threshold is None else threshold,
+                })
+            for product_id, sent in list(self._last_sent.items()):
+                if now - sent >= self.interval:
+                    del self._last_sent[product_id]
+        return alerts
+
+    def flush(self, db: Session) -> int:
+        alerts = self.due()
+        if not alerts:
+            return 0
+
+        names = dict(db.query(Product.id, Product.name).filter(Product.id.in_([a["product_id"] for a in alerts])))
+        admin_ids = [user_id for (user_id,) in db.query(User.id).filter(User.role == "admin")]
+        rows = []
+        for alert in alerts:
+            alert["product_name"] = names.get(alert["product_id"])
+            if alert["type"] == "low_stock":
+                message = f"Low stock: {alert['product_name']} (product {alert['product_id']}) has {alert['stock_quantity']} left"
+            else:
+                message = f"Restocked: {alert['product_name']} (product {alert['product_id']}) has {alert['stock_quantity']} in stock"
+            rows.extend({"id": admin_id, "message": message} for admin_id in admin_ids)
+        if rows:
+            db.execute(insert(Notification), rows)
+            db.commit()
+
+        AdminManager.broadcast_threadsafe(json.dumps({"type": "stock_alerts", "alerts": alerts}))
+        return len(alerts)
+
+
+def record_on_commit(db: Session, product_id: int, was_low: bool, stock_quantity: int, threshold: int | None):
+    # checkout / release changes only count once db's transaction commits
+    db.info.setdefault("stock_alerts", []).append((product_id, was_low, stock_quantity, threshold))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _record_committed(session):
+    for change in session.info.pop("stock_alerts", []):
+        stock_alerts.record(*change)
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _drop_uncommitted(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("stock_alerts", None)
+
+
+def _flush():
+    db = SessionLocal()
+    try:
+        stock_alerts.flush(db)
+    finally:
+        db.close()
+
+
+stock_alerts = StockAlerts(STOCK_ALERT_INTERVAL)
+stock_alert_flusher = PeriodicTask("stock-alert-flusher", STOCK_ALERT_FLUSH_INTERVAL, _flush)
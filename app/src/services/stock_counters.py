@@ -0,0 +1,197 @@
+import logging
+import random
+
+from sqlalchemy import bindparam, event, update
+from sqlalchemy.orm import Session
+
+from app.src.core.config import STOCK_COUNTER_STORE, STOCK_SHARDS, STOCK_RECONCILE_INTERVAL
+from app.src.db.database import SessionLocal
+from app.src.models.inventory import Inventory
+from app.src.services.kv_store import connect_kv, is_shared
+from app.src.services.stock_alerts import is_low, record_on_commit
+from app.src.utils.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedStockCounters:
+    """
+    Stock of flash-sale products (Inventory.sharded) split over N key-value counters.
+
+    Checkout decrements a random shard instead of the single inventory row, so
+    concurrent buyers of one product mostly hit different keys and never wait on a
+    database row lock. Inventory.stock_quantity stays the durable copy: the
+    reconciler folds the shard totals back into it, and on startup shards are seeded
+    from it again.
+
+    Counters must live in a store every worker shares (`shared`). With the
+    in-process store each worker would seed its own full copy of the stock and
+    could sell all of it, so nothing is sharded there and flagged products keep
+    selling from the inventory row.
+    """
+
+    FLAGGED_KEY = "stock:sharded"
+
+    def __init__(self, kv, shards: int, shared: bool):
+        self.kv = kv
+        self.shards = shards
+        self.shared = shared
+
+    def sharded_ids(self, product_ids) -> set[int]:
+        flagged = self.kv.smembers(self.FLAGGED_KEY)
+        return {product_id for product_id in product_ids if str(product_id) in flagged}
+
+    def take(self, product_id: int, quantity: int) -> bool:
+        # all-or-nothing: shards are drained from a random starting point and
+        # everything goes back if together they can't cover the quantity
+        keys = self._keys(product_id)
+        start = random.randrange(self.shards)
+        taken = []
+        needed = quantity
+        for key in keys[start:] + keys[:start]:
+            available = int(self.kv.get(key) or 0)
+            if available <= 0:
+                continue
+            amount = min(available, needed)
+            if self.kv.incrby(key, -amount) < 0:
+                # lost the race for this shard
+                self.kv.incrby(key, amount)
+                continue
+            taken.append((key, amount))
+            needed -= amount
+            if needed == 0:
+                return True
+
+        for key, amount in taken:
+            self.kv.incrby(key, amount)
+        return False
+
+    def give(self, product_id: int, quantity: int):
+        self.kv.incrby(random.choice(self._keys(product_id)), quantity)
+
+    def total(self, product_id: int) -> int:
+        return sum(int(value or 0) for value in self.kv.mget(self._keys(product_id)))
+
+    def distribute(self, product_id: int, stock_quantity: int):
+        # replaces the counters with an even split of stock_quantity
+        if not self.shared:
+            return
+        base, extra = divmod(stock_quantity, self.shards)
+        for index, key in enumerate(self._keys(product_id)):
+            self.kv.set(key, base + (1 if index < extra else 0))
+        self.kv.sadd(self.FLAGGED_KEY, product_id)
+
+    def drain(self, product_id: int) -> int:
+        # empties the counters and returns the stock they held; buyers see the product
+        # sold out until `refill`, stock given back meanwhile stays in its shard
+        drained = 0
+        for key in self._keys(product_id):
+            available = int(self.kv.get(key) or 0)
+            if available <= 0:
+                continue
+            left = self.kv.incrby(key, -available)
+            if left < 0:
+                # a buyer took some of it first
+                self.kv.incrby(key, -left)
+                available += left
+            drained += available
+        return drained
+
+    def refill(self, product_id: int, quantity: int):
+        # adds an even split of quantity on top of whatever the shards hold
+        base, extra = divmod(quantity, self.shards)
+        for index, key in enumerate(self._keys(product_id)):
+            self.kv.incrby(key, base + (1 if index < extra else 0))
+
+    def unshard(self, product_id: int):
+        self.kv.srem(self.FLAGGED_KEY, product_id)
+        self.kv.delete(*self._keys(product_id))
+
+    def load(self, db: Session):
+        # seeds shards for flagged products that have none (fresh store, restarted worker)
+        if not self.shared:
+            if db.query(Inventory.product_id).filter(Inventory.sharded.is_(True)).first():
+                logger.warning("Sharded products sell from their inventory rows: STOCK_COUNTER_STORE is not shared")
+            return
+        for product_id, stock_quantity in db.query(Inventory.product_id, Inventory.stock_quantity).filter(Inventory.sharded.is_(True)):
+            if all(value is None for value in self.kv.mget(self._keys(product_id))):
+                self.distribute(product_id, stock_quantity)
+            else:
+                self.kv.sadd(self.FLAGGED_KEY, product_id)
+
+    def reconcile(self, db: Session) -> int:
+        totals = [
+            {"pid": int(product_id), "quantity": self.total(int(product_id))}
+            for product_id in self.kv.smembers(self.FLAGGED_KEY)
+        ]
+        if not totals:
+            return 0
+        previous = {
+            product_id: (stock_quantity, threshold) for product_id, stock_quantity, threshold in
+            db.query(Inventory.product_id, Inventory.stock_quantity, Inventory.low_stock_threshold)
+            .filter(Inventory.product_id.in_([row["pid"] for row in totals]), Inventory.sharded.is_(True))
+        }
+        # one executemany against the table, not an ORM bulk update
+        inventory = Inventory.__table__
+        db.execute(
+            update(inventory)
+            .where(inventory.c.product_id == bindparam("pid"), inventory.c.sharded.is_(True))
+            .values(stock_quantity=bindparam("quantity")),
+            totals
+        )
+        for row in totals:
+            if row["pid"] in previous:
+                stock_quantity, threshold = previous[row["pid"]]
+                record_on_commit(db, row["pid"], is_low(stock_quantity, threshold), row["quantity"], threshold)
+        db.commit()
+        return len(totals)
+
+    def _keys(self, product_id: int) -> list[str]:
+        return [f"stock:{product_id}:{index}" for index in range(self.shards)]
+
+
+def take_in_transaction(db: Session, product_id: int, quantity: int) -> bool:
+    # counters aren't transactional: give the stock back if db's transaction doesn't commit
+    if not stock_counters.take(product_id, quantity):
+        return False
+    db.info.setdefault("stock_on_rollback", []).append((product_id, quantity))
+    return True
+
+
+def give_on_commit(db: Session, product_id: int, quantity: int):
+    db.info.setdefault("stock_on_commit", []).append((product_id, quantity))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_committed(session):
+    session.info.pop("stock_on_rollback", None)
+    for product_id, quantity in session.info.pop("stock_on_commit", []):
+        stock_counters.give(product_id, quantity)
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _undo_uncommitted(session, transaction):
+    if transaction.parent is not None:
+        return
+    session.info.pop("stock_on_commit", None)
+    for product_id, quantity in session.info.pop("stock_on_rollback", []):
+        stock_counters.give(product_id, quantity)
+
+
+def _reconcile():
+    db = SessionLocal()
+    try:
+        stock_counters.reconcile(db)
+    finally:
+        db.close()
+
+
+def get_stock_counters() -> ShardedStockCounters:
+    kv = connect_kv(STOCK_COUNTER_STORE)
+    if kv is None:
+        raise ValueError("STOCK_COUNTER_STORE must be 'memory' or a redis:// or rediss:// url")
+    return ShardedStockCounters(kv, STOCK_SHARDS, shared=is_shared(kv))
+
+
+stock_counters = get_stock_counters()
+stock_reconciler = PeriodicTask("stock-reconciler", STOCK_RECONCILE_INTERVAL, _reconcile)
@@ -0,0 +1,142 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+from app.src.core.config import RESERVATION_TTL, RESERVATION_SWEEP_INTERVAL, RESERVATION_SWEEP_BATCH
+from app.src.db.database import SessionLocal
+from app.src.models.inventory import Inventory
+from app.src.models.orders import Order
+from app.src.models.reservations import StockReservation
+from app.src.services.stock_alerts import is_low, record_on_commit
+from app.src.services.stock_counters import stock_counters, take_in_transaction, give_on_commit
+from app.src.utils.periodic import PeriodicTask
+
+
+def reserve_stock(db: Session, order_id: int, lines: list[dict]):
+    """
+    Takes the order's quantities out of inventory inside the caller's transaction.
+
+    Each product is one conditional UPDATE (stock_quantity >= qty), so there is no
+    read-check-write window and no row is locked longer than the UPDATE itself until
+    commit. Products are always touched in id order, so two checkouts sharing products
+    queue behind each other instead of deadlocking. Sharded (flash-sale) products are
+    taken from their counters instead and never touch the inventory row. Raises 409
+    if any product is short; the caller's rollback puts back whatever was already taken.
+    """
+    quantities = defaultdict(int)
+    for line in lines:
+        quantities[line["product_id"]] += line["quantity"]
+    sharded = stock_counters.sharded_ids(quantities)
+
+    for product_id in sorted(quantities):
+        if product_id in sharded:
+            if not take_in_transaction(db, product_id, quantities[product_id]):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Insufficient stock for product {product_id}"
+                )
+            continue
+        row = db.execute(
+            update(Inventory)
+            .where(Inventory.product_id == product_id, Inventory.stock_quantity >= quantities[product_id])
+            .values(stock_quantity=Inventory.stock_quantity - quantities[product_id])
+            .returning(Inventory.stock_quantity, Inventory.low_stock_threshold)
+        ).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Insufficient stock for product {product_id}"
+            )
+        was_low = is_low(row.stock_quantity + quantities[product_id], row.low_stock_threshold)
+        record_on_commit(db, product_id, was_low, row.stock_quantity, row.low_stock_threshold)
+
+    expires_at = datetime.utcnow() + timedelta(seconds=RESERVATION_TTL)
+    db.execute(insert(StockReservation), [
+        {"order_id": order_id, "product_id": product_id, "quantity": quantity, "expires_at": expires_at}
+        for product_id, quantity in sorted(quantities.items())
+    ])
+
+
+def release_stock(db: Session, order_ids: list[int]):
+    # puts reserved quantities back, one UPDATE per product in id order; caller commits
+    if not order_ids:
+        return
+    totals = (
+        db.query(StockReservation.product_id, func.sum(StockReservation.quantity))
+        .filter(StockReservation.order_id.in_(order_ids))
+        .group_by(StockReservation.product_id)
+        .order_by(StockReservation.product_id)
+        .all()
+    )
+    sharded = stock_counters.sharded_ids(product_id for product_id, _ in totals)
+    for product_id, quantity in totals:
+        if product_id in sharded:
+            give_on_commit(db, product_id, quantity)
+            continue
+        row = db.execute(
+            update(Inventory)
+            .where(Inventory.product_id == product_id)
+            .values(stock_quantity=Inventory.stock_quantity + quantity)
+            .returning(Inventory.stock_quantity, Inventory.low_stock_threshold)
+        ).first()
+        if row is not None:
+            was_low = is_low(row.stock_quantity - quantity, row.low_stock_threshold)
+            record_on_commit(db, product_id, was_low, row.stock_quantity, row.low_stock_threshold)
+    db.query(StockReservation).filter(StockReservation.order_id.in_(order_ids)).delete(synchronize_session=False)
+
+
+def _transition(db: Session, order_id: int, from_status: str, to_status: str) -> bool:
+    # conditional status change: only one of several racing callers wins the release
+    result = db.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status == from_status)
+        .values(status=to_status)
+    )
+    return result.rowcount == 1
+
+
+def cancel_order(db: Session, order_id: int, user_id: int):
+    exists = db.query(Order.id).filter(Order.id == order_id, Order.user_id == user_id).first()
+    if not exists:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+
+    if not _transition(db, order_id, "pending", "canceled"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only pending orders can be canceled")
+
+    release_stock(db, [order_id])
+    db.commit()
+
+
+def expire_reservations(db: Session, batch_size: int = RESERVATION_SWEEP_BATCH) -> int:
+    # pending orders whose hold ran out become "expired" and give their stock back
+    expired = 0
+    while True:
+        order_ids = [
+            order_id for (order_id,) in
+            db.query(StockReservation.order_id)
+            .join(Order, Order.id == StockReservation.order_id)
+            .filter(StockReservation.expires_at < datetime.utcnow(), Order.status == "pending")
+            .distinct()
+            .limit(batch_size)
+        ]
+        if not order_ids:
+            return expired
+
+        won = [order_id for order_id in order_ids if _transition(db, order_id, "pending", "expired")]
+        release_stock(db, won)
+        db.commit()
+        expired += len(won)
+
+
+def _sweep():
+    db = SessionLocal()
+    try:
+        expire_reservations(db)
+    finally:
+        db.close()
+
+
+reservation_sweeper = PeriodicTask("reservation-sweeper", RESERVATION_SWEEP_INTERVAL, _sweep)
@@ -0,0 +1,158 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.src.core.config import SUGGEST_REFRESH_INTERVAL
+from app.src.db.database import SessionLocal
+from app.src.models.products import Product
+from app.src.models.orders import OrderItem
+from app.src.services.product_sync import ProductSync
+from app.src.utils.periodic import PeriodicTask
+
+
+MAX_SUGGESTIONS = 10
+MAX_MEMO_ENTRIES = 50_000
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+class SuggestIndex:
+    """
+    In-memory prefix index over Product.name for autocomplete.
+
+    Every word start of a name is a key in one sorted array, so a prefix lookup is two
+    bisects plus a scan of the matching range. Ranked results per prefix are memoized
+    and dropped whenever a name under that prefix (or its popularity) changes, so the
+    broad one- and two-letter prefixes are only scanned once between changes.
+    Popularity is the number of units ordered.
+
+    Writes in this process update the index directly; writes made by other workers
+    are picked up by `refresh`, which applies only the products changed or deleted
+    since its previous pass. Popularity comes from this worker's own sales between
+    rebuilds.
+    """
+
+    def __init__(self):
+        self._keys: list[tuple[str, int]] = []   # sorted (suffix of normalized name, product_id)
+        self._names: dict[int, str] = {}
+        self._popularity: dict[int, int] = {}
+        self._memo: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+        self.sync = ProductSync()
+
+    def rebuild(self, db: Session):
+        self.sync.begin(db)
+        names = {}
+        rows = db.query(Product.id, Product.name).execution_options(yield_per=1000)
+        for row in rows:
+            names[row.id] = row.name
+
+        popularity = dict(
+            db.query(OrderItem.product_id, func.sum(OrderItem.quantity))
+            .group_by(OrderItem.product_id)
+            .all()
+        )
+
+        keys = [key for product_id, name in names.items() for key in self._keys_for(product_id, name)]
+        keys.sort()
+
+        with self._lock:
+            self._keys = keys
+            self._names = names
+            self._popularity = {product_id: int(total) for product_id, total in popularity.items()}
+            self._memo.clear()
+
+    def refresh(self, db: Session) -> bool:
+        with self._lock:
+            indexed_ids = list(self._names)
+        changes = self.sync.changes(db, [Product.name], indexed_ids)
+        if changes is None:
+            return False
+        rows, deleted = changes
+        for row in rows:
+            if self._names.get(row.id) != row.name:
+                self.add_product(row.id, row.name)
+        for product_id in deleted:
+            self.remove_product(product_id)
+        return True
+
+    def add_product(self, product_id: int, name: str):
+        # also used for renames: the old keys are replaced
+        with self._lock:
+            self._remove(product_id)
+            self._names[product_id] = name
+            for key in self._keys_for(product_id, name):
+                insort(self._keys, key)
+                self._forget(key[0])
+
+    def remove_product(self, product_id: int):
+        with self._lock:
+            self._remove(product_id)
+            self._popularity.pop(product_id, None)
+
+    def record_sale(self, product_id: int, quantity: int):
+        with self._lock:
+            if product_id not in self._names:
+                return
+            self._popularity[product_id] = self._popularity.get(product_id, 0) + quantity
+            for key in self._keys_for(product_id, self._names[product_id]):
+                self._forget(key[0])
+
+    def suggest(self, q: str, limit: int = MAX_SUGGESTIONS) -> list[dict]:
+        prefix = normalize(q)
+        if not prefix:
+            return []
+
+        with self._lock:
+            ranked = self._memo.get(prefix)
+            if ranked is None:
+                lo = bisect_left(self._keys, (prefix,))
+                hi = bisect_left(self._keys, (prefix + "\uffff",))
+                matches = {product_id for _, product_id in self._keys[lo:hi]}
+                ranked = heapq.nsmallest(
+                    MAX_SUGGESTIONS, matches,
+                    key=lambda product_id: (-self._popularity.get(product_id, 0), product_id)
+                )
+                if len(self._memo) >= MAX_MEMO_ENTRIES:
+                    self._memo.clear()
+                self._memo[prefix] = ranked
+
+            return [{"id": product_id, "name": self._names[product_id]} for product_id in ranked[:limit]]
+
+    def _remove(self, product_id: int):
+        name = self._names.pop(product_id, None)
+        if name is None:
+            return
+        for key in self._keys_for(product_id, name):
+            index = bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+            self._forget(key[0])
+
+    def _forget(self, key: str):
+        # drop memoized results for every prefix of this key
+        for end in range(1, len(key) + 1):
+            self._memo.pop(key[:end], None)
+
+    @staticmethod
+    def _keys_for(product_id: int, name: str) -> list[tuple[str, int]]:
+        words = normalize(name).split(" ")
+        return list({(" ".join(words[i:]), product_id) for i in range(len(words)) if words[i]})
+
+
+def _refresh():
+    db = SessionLocal()
+    try:
+        suggest_index.refresh(db)
+    finally:
+        db.close()
+
+
+suggest_index = SuggestIndex()
+suggest_refresher = PeriodicTask("suggest-refresher", SUGGEST_REFRESH_INTERVAL, _refresh)
@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+
+from app.src.models.versions import TableVersion
+
+
+def bump_version(db: Session, name: str):
+    # called before commit so the marker moves atomically with the data it describes
+    now = datetime.utcnow()
+    updated = (
+        db.query(TableVersion)
+        .filter(TableVersion.name == name)
+        .update(
+            {TableVersion.version: TableVersion.version + 1, TableVersion.updated_at: now},
+            synchronize_session=False
+        )
+    )
+    if not updated:
+        db.add(TableVersion(name=name, version=1, updated_at=now))
+
+
+def get_version(db: Session, name: str) -> tuple[int, datetime | None]:
+    row = (
+        db.query(TableVersion.version, TableVersion.updated_at)
+        .filter(TableVersion.name == name)
+        .first()
+    )
+    if not row:
+        return 0, None
+    return row.version, row.updated_at
@@ -0,0 +1,263 @@
+import hashlib
+import hmac
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.src.core.config import (
+    WEBHOOK_TOLERANCE, WEBHOOK_INBOX_BATCH, WEBHOOK_APPLY_INTERVAL, WEBHOOK_APPLY_BATCH, WEBHOOK_UNMATCHED_MAX_AGE
+)
+from app.src.db.database import SessionLocal, engine
+from app.src.models.notification import Notification
+from app.src.models.orders import Order
+from app.src.models.payments import Payment
+from app.src.models.reservations import StockReservation
+from app.src.models.user import User
+from app.src.models.webhooks import WebhookEvent
+from app.src.utils.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# provider event type -> Payment.status
+PAYMENT_EVENT_STATUSES = {
+    "payment_intent.succeeded": "succeeded",
+    "payment_intent.payment_failed": "failed",
+    "payment_intent.canceled": "canceled",
+}
+# a payment in one of these never changes again, so late or replayed events are ignored
+FINAL_PAYMENT_STATUSES = {"succeeded", "canceled"}
+
+
+def sign_payload(payload: bytes, secret: str, timestamp: int) -> str:
+    # Stripe-Signature scheme: HMAC-SHA256 of "<timestamp>.<body>"
+    signature = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def verify_signature(payload: bytes, header: str | None, secret: str, tolerance: int = WEBHOOK_TOLERANCE):
+    invalid = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid webhook signature")
+    if not header:
+        raise invalid
+    timestamp, signatures = None, []
+    for part in header.split(","):
+        name, _, value = part.strip().partition("=")
+        if name == "t":
+            timestamp = value
+        elif name == "v1":
+            signatures.append(value)
+    if not timestamp or not timestamp.isdigit() or not signatures:
+        raise invalid
+    if abs(time.time() - int(timestamp)) > tolerance:
+        # replayed capture of an old delivery
+        raise invalid
+    expected = sign_payload(payload, secret, int(timestamp)).rsplit("v1=", 1)[1]
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise invalid
+
+
+def _insert_new_events():
+    # INSERT ... ON CONFLICT (provider, event_id) DO NOTHING: redeliveries are dropped by the database
+    dialect = postgresql if engine.dialect.name == "postgresql" else sqlite
+    return dialect.insert(WebhookEvent).on_conflict_do_nothing(index_elements=["provider", "event_id"])
+
+
+class WebhookInbox:
+    """
+    Group commit for the webhook inbox. Each request hands its event to one writer
+    thread and waits for the returned future; the writer inserts everything that
+    arrived meanwhile (up to `batch_size`) as one statement and one commit, then
+    resolves all of the futures. A burst of deliveries costs a few commits instead
+    of one per request, and the inbox is append-only, so acknowledging a webhook
+    never waits on the payment and order rows the applier is updating.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self._events: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    def append(self, event: dict) -> Future:
+        future = Future()
+        if self._thread is None:
+            # not started (scripts, tests): write inline
+            self._write([(event, future)])
+        else:
+            self._events.put((event, future))
+        return future
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="webhook-inbox", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._events.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._events.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._events.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: list[tuple[dict, Future]]):
+        rows = {(event["provider"], event["event_id"]): event for event, _ in batch}
+        db = SessionLocal()
+        try:
+            db.execute(_insert_new_events(), list(rows.values()))
+            db.commit()
+        except Exception as exp:
+            db.rollback()
+            logger.exception("Webhook inbox write failed")
+            for _, future in batch:
+                future.set_exception(exp)
+            return
+        finally:
+            db.close()
+        for _, future in batch:
+            future.set_result(True)
+
+
+def apply_webhook_events(db: Session, batch_size: int = WEBHOOK_APPLY_BATCH) -> int:
+    """
+    Applies inbox events to payments and orders, oldest event first, `batch_size`
+    events per transaction. Pending events are claimed with FOR UPDATE SKIP LOCKED,
+    so appliers in several processes split the inbox instead of waiting on each
+    other. A succeeded payment moves its order from "pending" to "paid" and consumes
+    the order's stock reservation, so the sweeper no longer releases it. If the
+    order was already expired or canceled, the money was taken for stock that was
+    released: the event is marked "needs_refund" and every admin gets a
+    Notification in the same transaction.
+
+    The webhook can beat the commit of the Payment row it refers to, so an event
+    with no matching payment stays pending and is retried on later runs. Only after
+    WEBHOOK_UNMATCHED_MAX_AGE is it marked "unmatched" and reported to admins.
+    Returns the number of events finished.
+    """
+    processed = 0
+    # unmatched events left pending by this run, so the loop moves past them
+    deferred: list[int] = []
+    while True:
+        query = db.query(WebhookEvent).filter(WebhookEvent.processed_at.is_(None))
+        if deferred:
+            query = query.filter(WebhookEvent.id.notin_(deferred))
+        events = (
+            query
+            .order_by(WebhookEvent.event_created_at, WebhookEvent.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not events:
+            return processed
+
+        intent_ids = {event.intent_id for event in events if event.intent_id}
+        payments = {
+            payment.provider_intent_id: payment for payment in
+            db.query(Payment).filter(Payment.provider_intent_id.in_(intent_ids))
+        } if intent_ids else {}
+
+        # order_id -> the succeeded event that pays it
+        paid_orders: dict[int, WebhookEvent] = {}
+        unmatched: list[WebhookEvent] = []
+        now = datetime.utcnow()
+        give_up_before = now - timedelta(seconds=WEBHOOK_UNMATCHED_MAX_AGE)
+        for event in events:
+            new_status = PAYMENT_EVENT_STATUSES.get(event.event_type)
+            payment = payments.get(event.intent_id)
+            if new_status is None:
+                event.result = "ignored"
+            elif payment is None:
+                if event.received_at > give_up_before:
+                    deferred.append(event.id)
+                    continue
+                event.result = "unmatched"
+                unmatched.append(event)
+            elif payment.status in FINAL_PAYMENT_STATUSES:
+                # duplicate, or older than the event that settled the payment
+                event.result = "ignored"
+            else:
+                payment.status = new_status
+                event.result = "applied"
+                if new_status == "succeeded":
+                    paid_orders[payment.order_id] = event
+            event.processed_at = now
+
+        if paid_orders:
+            paid = [
+                order_id for (order_id,) in db.execute(
+                    update(Order)
+                    .where(Order.id.in_(list(paid_orders)), Order.status == "pending")
+                    .values(status="paid")
+                    .returning(Order.id)
+                )
+            ]
+            db.query(StockReservation).filter(StockReservation.order_id.in_(paid)).delete(synchronize_session=False)
+            late = sorted(set(paid_orders) - set(paid))
+            if late:
+                _flag_refunds(db, {order_id: paid_orders[order_id] for order_id in late})
+        if unmatched:
+            _notify_admins(db, [
+                f"Unmatched payment event: {event.event_type} for intent {event.intent_id} "
+                f"(event {event.event_id}) has no payment record" for event in unmatched
+            ])
+            logger.warning("Payment events without a payment record: %s", [event.event_id for event in unmatched])
+
+        db.commit()
+        processed += len(events) - sum(1 for event in events if event.processed_at is None)
+
+
+def _flag_refunds(db: Session, late: dict[int, WebhookEvent]):
+    # payments captured for orders that expired or were canceled first; caller commits
+    statuses = dict(db.query(Order.id, Order.status).filter(Order.id.in_(list(late))))
+    messages = []
+    for order_id, event in late.items():
+        event.result = "needs_refund"
+        messages.append(
+            f"Refund needed: payment {event.intent_id} succeeded for order {order_id}, "
+            f"which is {statuses.get(order_id, 'missing')}"
+        )
+    _notify_admins(db, messages)
+    logger.warning("Payment succeeded for orders that are no longer pending: %s", sorted(late))
+
+
+def _notify_admins(db: Session, messages: list[str]):
+    # one Notification per admin and message, in the caller's transaction
+    admin_ids = [user_id for (user_id,) in db.query(User.id).filter(User.role == "admin")]
+    rows = [{"id": admin_id, "message": message} for message in messages for admin_id in admin_ids]
+    if rows:
+        db.execute(insert(Notification), rows)
+
+
+def _apply():
+    db = SessionLocal()
+    try:
+        apply_webhook_events(db)
+    finally:
+        db.close()
+
+
+webhook_inbox = WebhookInbox(WEBHOOK_INBOX_BATCH)
+webhook_applier = PeriodicTask("webhook-applier", WEBHOOK_APPLY_INTERVAL, _apply)
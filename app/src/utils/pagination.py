@@ -0,0 +1,73 @@
+import base64
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, inspect, select
+from sqlalchemy.orm import Query, Session
+
+# past this many matching rows, non-Postgres databases report a lower bound instead of counting on
+COUNT_ESTIMATE_CAP = 10000
+
+
+# Cursors are opaque to clients: the last row's sort key plus the sort they belong to,
+# packed as url-safe base64 json so they can travel in a query string.
+def encode_cursor(sort: str, values: list) -> str:
+    raw = json.dumps({"s": sort, "k": values}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = data["k"]
+        cursor_sort = data["s"]
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    # a cursor is only meaningful for the ordering that produced it
+    if cursor_sort != sort or not isinstance(values, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match sort order")
+    return values
+
+
+def cursor_key(values: list, types: tuple[type, ...]) -> tuple:
+    # the decoded key must match the keyset columns in length and type: a mistyped
+    # value is a DataError on Postgres and a silently empty page on SQLite
+    invalid = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if len(values) != len(types):
+        raise invalid
+    key = []
+    for value, kind in zip(values, types):
+        if isinstance(value, bool):
+            raise invalid
+        if kind is float:
+            valid = isinstance(value, (int, float))
+        else:
+            valid = isinstance(value, kind)
+        if not valid:
+            raise invalid
+        key.append(kind(value))
+    return tuple(key)
+
+
+def estimate_count(db: Session, query: Query) -> tuple[int, bool]:
+    """
+    Returns (count, is_estimate) for a filtered query without a full COUNT(*).
+
+    On Postgres this is the planner's row estimate from EXPLAIN, which reads only
+    statistics. Elsewhere rows are counted up to COUNT_ESTIMATE_CAP and anything
+    beyond is reported as the cap.
+    """
+    if db.bind.dialect.name == "postgresql":
+        compiled = query.order_by(None).statement.compile(dialect=db.bind.dialect)
+        plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"]), True
+
+    # primary key only, so the capped scan can stay inside an index
+    primary_key = inspect(query.column_descriptions[0]["entity"]).primary_key
+    capped = query.with_entities(*primary_key).order_by(None).limit(COUNT_ESTIMATE_CAP + 1).subquery()
+    count = db.execute(select(func.count()).select_from(capped)).scalar()
+    return min(count, COUNT_ESTIMATE_CAP), count > COUNT_ESTIMATE_CAP
@@ -0,0 +1,170 @@
+import gzip
+import hashlib
+import os
+import re
+import stat
+import sys
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+from mimetypes import guess_type
+
+from fastapi.staticfiles import StaticFiles
+from starlette.staticfiles import NotModifiedResponse
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+
+from app.src.core.config import STATIC_CACHE_MAX_BYTES, STATIC_CACHE_MAX_FILE_BYTES
+
+
+# content-addressed files (sha256 names from the upload pipeline) never change
+CONTENT_HASH_RE = re.compile(r"(?:^|/)[0-9a-f]{64}(?:[-.][^/]*)?$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".json", ".svg", ".html", ".txt", ".xml", ".map"}
+
+
+class SmallFileCache:
+    # LRU of small file bodies bounded by total bytes, keyed on path + mtime + size
+    def __init__(self, max_bytes: int, max_file_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body: bytes):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with caching headers tuned for the catalog's assets.
+
+    - far-future immutable Cache-Control for content-hashed file names
+    - serves a precompressed .br/.gz sibling when the client accepts it
+    - small files are answered from an in-memory LRU
+    - everything else (and any Range request) goes through FileResponse, which
+      handles ranges and streams from disk (sendfile/pathsend where the server has it)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.small_files = SmallFileCache(STATIC_CACHE_MAX_BYTES, STATIC_CACHE_MAX_FILE_BYTES)
+
+    async def get_response(self, path: str, scope):
+        # dotfiles are upload temp files and pipeline checkpoints, never public
+        if any(part.startswith(".") for part in path.replace("\\", "/").split("/") if part):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        media_type = guess_type(full_path)[0] or "text/plain"
+
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if CONTENT_HASH_RE.search(full_path) else DEFAULT_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+
+        # Range requests are served against the identity encoding
+        is_range = "range" in request_headers
+        if not is_range:
+            accepted = request_headers.get("accept-encoding", "")
+            for encoding, suffix in PRECOMPRESSED:
+                if encoding not in accepted:
+                    continue
+                try:
+                    encoded_stat = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                if stat.S_ISREG(encoded_stat.st_mode):
+                    full_path, stat_result = full_path + suffix, encoded_stat
+                    headers["Content-Encoding"] = encoding
+                    break
+
+        if not is_range and stat_result.st_size <= self.small_files.max_file_bytes:
+            response = self._cached_response(full_path, stat_result, media_type, headers, status_code)
+        else:
+            response = FileResponse(
+                full_path, status_code=status_code, stat_result=stat_result,
+                media_type=media_type, headers=headers
+            )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def _cached_response(self, full_path: str, stat_result: os.stat_result, media_type: str, headers: dict, status_code: int) -> Response:
+        key = (full_path, stat_result.st_mtime_ns, stat_result.st_size)
+        body = self.small_files.get(key)
+        if body is None:
+            with open(full_path, "rb") as f:
+                body = f.read()
+            self.small_files.set(key, body)
+
+        # same validators FileResponse would send for this file
+        etag = hashlib.md5(f"{stat_result.st_mtime}-{stat_result.st_size}".encode(), usedforsecurity=False).hexdigest()
+        headers = {
+            **headers,
+            "etag": f'"{etag}"',
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "accept-ranges": "bytes",
+        }
+        return Response(content=body, status_code=status_code, media_type=media_type, headers=headers)
+
+
+def precompress(directory: str) -> int:
+    # writes .gz (and .br when the brotli package is installed) next to compressible assets
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+
+            outputs = [(".gz", lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                outputs.append((".br", lambda raw: brotli.compress(raw, quality=11)))
+
+            for suffix, compress in outputs:
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                encoded = compress(data)
+                if len(encoded) < len(data):
+                    with open(target, "wb") as f:
+                        f.write(encoded)
+                    written += 1
+    return written
+
+
+if __name__ == "__main__":
+    # python -m app.src.utils.static_files [directory]
+    directory = sys.argv[1] if len(sys.argv) > 1 else "app/static"
+    print(f"Precompressed {precompress(directory)} files in {directory}")
@@ -1,32 +1,97 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from fastapi.staticfiles import StaticFiles
 
-from app.src.db.database import Base, engine
+from app.src.db.database import Base, engine, SessionLocal
+from app.src.db.migrations import upgrade_schema
 from app.src.core.security import create_default_admin
+from app.src.services.search_service import search_backend, search_refresher
+from app.src.services.suggest_service import suggest_index, suggest_refresher
+from app.src.services.image_derivatives import shutdown_derivatives
+from app.src.services.cart_store import cart_store
+from app.src.services.stock_service import reservation_sweeper
+from app.src.services.stock_counters import stock_counters, stock_reconciler
+from app.src.services.stock_alerts import stock_alert_flusher
+from app.src.services.payment_gateway import payment_gateway
+from app.src.services.webhook_service import webhook_inbox, webhook_applier
+from app.src.services.order_queue import order_queue
+from app.src.services.order_push import order_status_poller
+from app.src.services.idempotency_service import idempotency_sweeper
 from app.src.routes.user import router as user_routes
-from app.src.routes.products import router as product_routes
+from app.src.routes.products import router as product_routes, warm_products_cache
 from app.src.routes.inventory import router as inventory_routes
 from app.src.routes.cart import router as cart_routes
-from app.src.routes.categories import router as category_routes
+from app.src.routes.categories import router as category_routes, warm_categories_cache
 from app.src.routes.orders import router as order_routes
+from app.src.routes.admin_orders import router as admin_order_routes
 from app.src.routes.payments import router as payment_routes
+from app.src.routes.cache import router as cache_routes
+from app.src.routes.exports import router as export_routes
+from app.src.core.config import MAX_IMAGE_UPLOAD_BYTES, IMAGE_UPLOAD_FORM_OVERHEAD
+from app.src.utils.static_files import CachedStaticFiles
+from app.src.utils.upload_limit import UploadSizeLimit
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
+    # columns and indexes added to existing tables since the database was created
+    upgrade_schema(engine)
     create_default_admin()
+
+    # build in-memory indexes and warm the catalog cache so a fresh worker doesn't start cold
+    db = SessionLocal()
+    try:
+        search_backend.rebuild(db)
+        suggest_index.rebuild(db)
+        warm_categories_cache(db)
+        warm_products_cache(db)
+        stock_counters.load(db)
+    finally:
+        db.close()
+
+    suggest_refresher.start()
+    search_refresher.start()
+    cart_store.start()
+    reservation_sweeper.start()
+    stock_reconciler.start()
+    order_queue.start()
+    order_status_poller.start()
+    idempotency_sweeper.start()
+    stock_alert_flusher.start()
+    webhook_inbox.start()
+    webhook_applier.start()
+
     yield
 
+    webhook_inbox.stop()
+    webhook_applier.stop()
+    idempotency_sweeper.stop()
+    order_queue.stop()
+    order_status_poller.stop()
+    reservation_sweeper.stop()
+    stock_reconciler.stop()
+    stock_alert_flusher.stop()
+    cart_store.stop()
+    suggest_refresher.stop()
+    search_refresher.stop()
+    payment_gateway.close()
+    shutdown_derivatives()
+
 app = FastAPI(lifespan=lifespan, title="Scalable E-Commerce Platform")
 
+# image uploads are refused before their multipart body is spooled to disk
+app.add_middleware(
+    UploadSizeLimit,
+    max_bytes=MAX_IMAGE_UPLOAD_BYTES + IMAGE_UPLOAD_FORM_OVERHEAD,
+    paths=("/admin/add-product", "/admin/update-product/")
+)
+
 @app.get("/")
 def home():
     return {"message": "Welcome to the E-Commerce Platform API"}
 
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="app/static"), name="static")
 
 app.include_router(user_routes)
 app.include_router(product_routes)
@@ -34,7 +99,10 @@ app.include_router(inventory_routes)
 app.include_router(category_routes)
 app.include_router(cart_routes)
 app.include_router(order_routes)
+app.include_router(admin_order_routes)
 app.include_router(payment_routes)
+app.include_router(cache_routes)
+app.include_router(export_routes)
 
 
 
@@ -0,0 +1,143 @@
+"""
+Checkout latency and statement count for carts of many items, before and after
+the single-transaction checkout.
+
+    python -m scripts.bench_checkout --checkouts 100 --items 20
+
+Each checkout turns a fresh cart of `--items` products into an order and
+serializes it as OrderOut, the way POST /orders responds. The run is done twice:
+
+    before  the original route body: commit the order, add and flush the items
+            one by one, clear the cart, commit again, lazy-load the response
+    after   order_service.create_order: one multi-row item INSERT, one commit,
+            the response loaded in two queries
+
+and prints p50/p95 latency, checkouts/s and the SQL statements per checkout for
+both. create_order also reserves stock (one conditional UPDATE per product),
+which the original flow never did, so "after" includes that work.
+DATABASE_URL is taken from the environment and defaults to a throwaway sqlite
+database.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+_workdir = tempfile.mkdtemp(prefix="bench-checkout-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("PAYMENT_PROVIDER", "fake")
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.src.db.database import Base, engine, SessionLocal
+from app.src.models import Category, Product, Inventory, User, Order, OrderItem
+from app.src.schemas.cart import CartOperation
+from app.src.schemas.orders import OrderOut
+from app.src.services.cart_store import cart_store
+from app.src.services.order_service import create_order
+
+
+def create_order_before(db: Session, user_id: int) -> Order:
+    # the POST /orders body before checkout became one unit of work
+    cart = cart_store.read(db, user_id)
+    order = Order(
+        user_id=user_id,
+        total_price=sum(item.product.price * item.quantity for item in cart['items']),
+        status="pending"
+    )
+    db.add(order)
+    db.commit()
+    db.refresh(order)
+
+    for item in cart['items']:
+        db.add(OrderItem(order_id=order.id, product_id=item.product_id, quantity=item.quantity, price=item.product.price))
+    cart_store.clear(db, user_id)
+    db.commit()
+    db.refresh(order)
+    return order
+
+
+CHECKOUTS = {"before": create_order_before, "after": create_order}
+
+
+def setup(users: int, items: int) -> list[int]:
+    db = SessionLocal()
+    try:
+        category = Category(name="bench")
+        db.add(category)
+        db.flush()
+        products = [
+            Product(name=f"product {index}", price=index + 1, category_id=category.id,
+                    image_path="/static/placeholder.svg")
+            for index in range(items)
+        ]
+        db.add_all(products)
+        db.flush()
+        db.add_all(Inventory(product_id=product.id, stock_quantity=users * 2) for product in products)
+        db.add_all(
+            User(id=user_id, fullname="buyer", email=f"buyer{user_id}@bench.local", password="-", role="User")
+            for user_id in range(1, users + 1)
+        )
+        db.commit()
+        return [product.id for product in products]
+    finally:
+        db.close()
+
+
+def run(checkout, user_ids: range, product_ids: list[int], statements: list) -> dict:
+    latencies = []
+    counts = []
+    for user_id in user_ids:
+        db = SessionLocal()
+        try:
+            cart_store.apply(db, user_id, [
+                CartOperation(op="add", product_id=product_id, quantity=2) for product_id in product_ids
+            ])
+            db.commit()
+
+            statements.clear()
+            started = time.perf_counter()
+            order = OrderOut.model_validate(checkout(db, user_id))
+            latencies.append(time.perf_counter() - started)
+            counts.append(len(statements))
+            assert len(order.items) == len(product_ids)
+        finally:
+            db.close()
+
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "p50": latencies[count // 2] * 1000,
+        "p95": latencies[int(count * 0.95)] * 1000,
+        "per_second": count / sum(latencies),
+        "statements": max(counts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkouts", type=int, default=100)
+    parser.add_argument("--items", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    product_ids = setup(args.checkouts * len(CHECKOUTS), args.items)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *rest: statements.append(statement))
+
+    for index, (name, checkout) in enumerate(CHECKOUTS.items()):
+        user_ids = range(index * args.checkouts + 1, (index + 1) * args.checkouts + 1)
+        result = run(checkout, user_ids, product_ids, statements)
+        print(
+            f"{name:>6}: checkouts={args.checkouts} items={args.items} "
+            f"p50={result['p50']:.1f}ms p95={result['p95']:.1f}ms "
+            f"{result['per_second']:.0f} checkouts/s statements/checkout={result['statements']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Checkout throughput for one hot SKU, with and without sharded stock counters.
+
+    python -m scripts.bench_stock_shards --buyers 200 --stock 1000
+
+Every buyer checks out one unit of the same product concurrently. The run is
+repeated with the product's stock on its inventory row and split over
+STOCK_SHARDS counters, and prints orders placed, stock left and checkouts/s for
+both. DATABASE_URL and STOCK_COUNTER_STORE are taken from the environment; by
+default a throwaway sqlite database and the in-process counter store are used,
+which is only valid here because the benchmark is a single process.
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_workdir = tempfile.mkdtemp(prefix="bench-shards-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir}/bench.db?timeout=60")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("PAYMENT_PROVIDER", "fake")
+
+from fastapi import HTTPException
+
+from app.src.db.database import Base, engine, SessionLocal
+from app.src.models import Category, Product, Inventory, User, Order, OrderItem, StockReservation
+from app.src.schemas.cart import CartOperation
+from app.src.services.cart_store import cart_store
+from app.src.services.order_service import create_order
+from app.src.services.stock_counters import stock_counters
+
+
+def setup(buyers: int) -> int:
+    db = SessionLocal()
+    try:
+        category = Category(name="bench")
+        db.add(category)
+        db.flush()
+        product = Product(name="hot sku", price=1, category_id=category.id, image_path="/static/placeholder.svg")
+        db.add(product)
+        db.flush()
+        db.add(Inventory(product_id=product.id, stock_quantity=0))
+        db.add_all(
+            User(id=user_id, fullname="buyer", email=f"buyer{user_id}@bench.local", password="-", role="User")
+            for user_id in range(1, buyers + 1)
+        )
+        db.commit()
+        return product.id
+    finally:
+        db.close()
+
+
+def run(product_id: int, buyers: int, stock: int, sharded: bool) -> dict:
+    db = SessionLocal()
+    try:
+        db.query(StockReservation).delete()
+        db.query(OrderItem).delete()
+        db.query(Order).delete()
+        db.query(Inventory).filter(Inventory.product_id == product_id).update(
+            {"stock_quantity": stock, "sharded": sharded}
+        )
+        db.commit()
+        for user_id in range(1, buyers + 1):
+            cart_store.apply(db, user_id, [CartOperation(op="set", product_id=product_id, quantity=1)])
+        db.commit()
+        if sharded:
+            stock_counters.distribute(product_id, stock)
+    finally:
+        db.close()
+
+    def checkout(user_id: int) -> bool:
+        session = SessionLocal()
+        try:
+            create_order(session, user_id)
+            return True
+        except HTTPException as exp:
+            if exp.status_code != 409:
+                raise
+            return False
+        finally:
+            session.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(buyers) as pool:
+        placed = sum(pool.map(checkout, range(1, buyers + 1)))
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        if sharded:
+            stock_counters.reconcile(db)
+        stock_left = db.query(Inventory.stock_quantity).filter(Inventory.product_id == product_id).scalar()
+    finally:
+        db.close()
+    return {"placed": placed, "rejected": buyers - placed, "stock_left": stock_left, "per_second": buyers / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buyers", type=int, default=200)
+    parser.add_argument("--stock", type=int, default=1000)
+    args = parser.parse_args()
+
+    # one process shares its in-memory counters with itself
+    stock_counters.shared = True
+
+    Base.metadata.create_all(bind=engine)
+    product_id = setup(args.buyers)
+    for sharded in (False, True):
+        result = run(product_id, args.buyers, args.stock, sharded)
+        print(
+            f"{'sharded' if sharded else 'row':>8}: buyers={args.buyers} placed={result['placed']} "
+            f"rejected={result['rejected']} stock_left={result['stock_left']} "
+            f"{result['per_second']:.0f} checkouts/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+# the app reads its settings at import time, so point it at a throwaway database first
+_workdir = tempfile.mkdtemp(prefix="ecommerce-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/test.db?timeout=60"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("PAYMENT_PROVIDER", "fake")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from app.src.core.security import create_token
+from app.src.db.database import Base, engine, SessionLocal
+from app.src.models import Category, Product, Inventory, User
+
+PLACEHOLDER_IMAGE = "/static/placeholder.svg"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def client():
+    # no lifespan: background workers stay off and services run inline
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    def make(email: str) -> tuple[int, dict]:
+        user = User(fullname="Test User", email=email, password="-", role="User")
+        db.add(user)
+        db.commit()
+        token = create_token({"id": user.id, "fullname": user.fullname, "email": user.email, "role": user.role})
+        return user.id, {"Authorization": f"Bearer {token}"}
+    return make
+
+
+@pytest.fixture
+def make_products(db):
+    # rows are written directly, so no image files are stored
+    def make(prefix: str, count: int, stock: int = 10, price: float = 1.0) -> list[int]:
+        category = Category(name=f"{prefix} category")
+        db.add(category)
+        db.flush()
+        products = [
+            Product(name=f"{prefix} {index}", price=price, category_id=category.id, image_path=PLACEHOLDER_IMAGE)
+            for index in range(count)
+        ]
+        db.add_all(products)
+        db.flush()
+        db.add_all(Inventory(product_id=product.id, stock_quantity=stock) for product in products)
+        db.commit()
+        return [product.id for product in products]
+    return make
@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.src.db.database import engine
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_reading_cart_costs_the_same_number_of_queries_for_any_size(client, make_user, make_products):
+    product_ids = make_products("cart queries", 50, price=2.5)
+
+    counts = {}
+    for size in (1, 10, 50):
+        _, headers = make_user(f"cart-{size}@example.com")
+        response = client.patch("/cart/", json={
+            "operations": [{"op": "add", "product_id": product_id, "quantity": 2} for product_id in product_ids[:size]]
+        }, headers=headers)
+        assert response.status_code == 200, response.text
+
+        with count_statements() as statements:
+            response = client.get("/cart/", headers=headers)
+        assert response.status_code == 200, response.text
+
+        cart = response.json()
+        assert len(cart["items"]) == size
+        assert cart["total_price"] == size * 2 * 2.5
+        assert all(item["product"]["name"] for item in cart["items"])
+        counts[size] = len(statements)
+
+    assert counts[1] == counts[10] == counts[50], counts
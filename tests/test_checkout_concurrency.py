@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app.src.db.database import SessionLocal
+from app.src.models import Inventory, Order, StockReservation
+from app.src.schemas.cart import CartOperation
+from app.src.services.cart_store import cart_store
+from app.src.services.order_service import create_order
+
+STOCK = 50
+BUYERS = 150
+
+
+def test_concurrent_checkouts_never_oversell(db, make_user, make_products, capsys):
+    [product_id] = make_products("flash sale", 1, stock=STOCK)
+    user_ids = [make_user(f"buyer-{index}@example.com")[0] for index in range(BUYERS)]
+    for user_id in user_ids:
+        cart_store.apply(db, user_id, [CartOperation(op="add", product_id=product_id, quantity=1)])
+    db.commit()
+
+    def checkout(user_id: int) -> int:
+        session = SessionLocal()
+        try:
+            create_order(session, user_id)
+            return 201
+        except HTTPException as exp:
+            return exp.status_code
+        finally:
+            session.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(BUYERS) as pool:
+        results = list(pool.map(checkout, user_ids))
+    elapsed = time.perf_counter() - started
+    with capsys.disabled():
+        print(f"\n{BUYERS} concurrent checkouts of one SKU: {BUYERS / elapsed:.0f} checkouts/s")
+
+    assert results.count(201) == STOCK
+    assert results.count(409) == BUYERS - STOCK
+
+    db.expire_all()
+    stock_left = db.query(Inventory.stock_quantity).filter(Inventory.product_id == product_id).scalar()
+    assert stock_left == 0
+    assert db.query(Order).filter(Order.user_id.in_(user_ids)).count() == STOCK
+    assert db.query(StockReservation).filter(StockReservation.product_id == product_id).count() == STOCK